@@ -5,6 +5,7 @@ Implementing a function in a source file, and then calling the
 `apply_feature_extractor` in OpenEO should be enoug to run the inference.
 """
 
+import numpy as np
 import openeo
 import xarray as xr
 
@@ -31,52 +32,244 @@ class QuantileIndicesExtractor(PatchFeatureExtractor):
     """Performs feature extraction by returning qunatile indices of the input
     array."""
 
+    # Input bands, in the order they are used in `execute`
+    _INPUT_BANDS = (
+        "S2-L2A-B03",
+        "S2-L2A-B04",
+        "S2-L2A-B05",
+        "S2-L2A-B06",
+        "S2-L2A-B08",
+        "S2-L2A-B11",
+        "S2-L2A-B12",
+    )
+
+    # Output band names, built once at class definition
+    _LABELS = tuple(
+        f"{index_name}:{quantile_value}"
+        for index_name in ("NDVI", "NDWI", "NDMI", "NDRE", "NDRE5", "B11", "B12")
+        for quantile_value in ("10", "50", "90", "IQR")
+    )
+
     def output_labels(self) -> list:
-        indices_names = ["NDVI", "NDWI", "NDMI", "NDRE", "NDRE5", "B11", "B12"]
-        quantile_values = ["10", "50", "90", "IQR"]
-        quantile_names = [
-            index_name + ":" + quantile_value
-            for index_name in indices_names
-            for quantile_value in quantile_values
-        ]
-        return quantile_names
+        return list(self._LABELS)
+
+    # The normalized differences are quantized to int16 with a 1e-4 resolution,
+    # missing values being encoded with the maximum int16 value.
+    INDEX_SCALE = 10000
+    INDEX_NODATA = np.iinfo(np.int16).max
+
+    # Numba kernel computing the quantiles, compiled on first use
+    _quantiles_kernel = None
+
+    @classmethod
+    def _get_quantiles_kernel(cls):
+        """Returns a numba compiled kernel computing the quantiles of every
+        pixel in parallel, or None if numba is not installed in the
+        environment. The kernel is compiled once per worker process, and has
+        the same semantics as the `_nanquantiles` method.
+        """
+        if cls._quantiles_kernel is None:
+            numba = cls._get_numba()
+            if numba is None:
+                cls._quantiles_kernel = False
+                return None
+
+            @numba.njit(parallel=True)
+            def kernel(stack, quantiles, nodata, out):
+                n_indices, n_t, height, width = stack.shape
+                for row in numba.prange(n_indices * height):
+                    idx = row // height
+                    y = row % height
+                    buffer = np.empty(n_t, dtype=stack.dtype)
+                    for x in range(width):
+                        # Insertion sort of the valid observations, cheaper
+                        # than a full sort for the short time series
+                        n_valid = 0
+                        for t in range(n_t):
+                            value = stack[idx, t, y, x]
+                            if value != value or value == nodata:
+                                continue
+                            position = n_valid
+                            while position > 0 and buffer[position - 1] > value:
+                                buffer[position] = buffer[position - 1]
+                                position -= 1
+                            buffer[position] = value
+                            n_valid += 1
+
+                        for q in range(quantiles.size):
+                            if n_valid == 0:
+                                out[q, idx, y, x] = np.nan
+                                continue
+                            rank = (n_valid - 1) * quantiles[q]
+                            lower = int(np.floor(rank))
+                            upper = int(np.ceil(rank))
+                            lower_value = np.float64(buffer[lower])
+                            upper_value = np.float64(buffer[upper])
+                            out[q, idx, y, x] = lower_value + (
+                                upper_value - lower_value
+                            ) * (rank - lower)
+
+            cls._quantiles_kernel = kernel
+        return cls._quantiles_kernel or None
+
+    @staticmethod
+    def _nanquantiles(
+        arr: np.ndarray, quantiles: list, axis: int, nodata=np.nan
+    ) -> np.ndarray:
+        """Computes the quantiles of the array along the given axis, ignoring
+        missing values (NaN, or `nodata` values for integer arrays, which must
+        be larger than any valid value) and using linear interpolation between
+        the closest ranks.
+
+        Without missing values, every pixel shares the same ranks and the
+        array is only partially sorted around those ranks with
+        `np.partition`. Otherwise, the whole array is sorted once (missing
+        values are sorted at the end) and the ranks of every pixel are
+        gathered with `np.take_along_axis`. Both avoid the per-pixel python
+        loop of `xarray.DataArray.quantile` on arrays containing NaN values.
+
+        Returns an array with a new leading dimension of size `len(quantiles)`
+        and without the reduced `axis`.
+        """
+        missing = np.isnan(arr) if np.isnan(nodata) else arr == nodata
+
+        if not missing.any():
+            positions = [(arr.shape[axis] - 1) * quantile for quantile in quantiles]
+            ranks = sorted(
+                {int(np.floor(position)) for position in positions}
+                | {int(np.ceil(position)) for position in positions}
+            )
+            arr_partitioned = np.partition(arr, ranks, axis=axis)
+
+            results = []
+            for position in positions:
+                lower = int(np.floor(position))
+                lower_values = np.take(arr_partitioned, lower, axis=axis)
+                upper_values = np.take(
+                    arr_partitioned, int(np.ceil(position)), axis=axis
+                )
+                results.append(
+                    lower_values
+                    + (upper_values - lower_values) * np.float32(position - lower)
+                )
+            return np.stack(results)
+
+        arr_sorted = np.sort(arr, axis=axis)
+        n_valid = arr.shape[axis] - np.sum(missing, axis=axis, keepdims=True)
+
+        results = []
+        for quantile in quantiles:
+            position = np.clip((n_valid - 1) * quantile, 0, None)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            # Interpolation weights in float32 to keep float32 results
+            weights = (position - lower).astype(np.float32)
+            lower_values = np.take_along_axis(arr_sorted, lower, axis=axis)
+            upper_values = np.take_along_axis(arr_sorted, upper, axis=axis)
+            result = lower_values + (upper_values - lower_values) * weights
+            # Pixels without any valid observation
+            result[n_valid == 0] = np.nan
+            results.append(result)
+
+        return np.squeeze(np.stack(results), axis=axis + 1)
+
+    def _compute_quantiles(
+        self, stack: np.ndarray, quantiles: list, out: np.ndarray, nodata=np.nan
+    ) -> None:
+        """Computes the quantiles of the (indices, t, y, x) stack over the time
+        dimension and writes them in the (indices, quantiles, y, x) output,
+        using the parallel numba kernel when numba is available.
+        """
+        kernel = self._get_quantiles_kernel()
+        if kernel is not None:
+            kernel(stack, np.array(quantiles), nodata, out.swapaxes(0, 1))
+        else:
+            out[...] = self._nanquantiles(
+                stack, quantiles, axis=1, nodata=nodata
+            ).swapaxes(0, 1)
 
     def execute(self, inarr: xr.DataArray) -> xr.DataArray:
-        # compute indices
-        b03 = inarr.sel(bands="S2-L2A-B03")
-        b04 = inarr.sel(bands="S2-L2A-B04")
-        b05 = inarr.sel(bands="S2-L2A-B05")
-        b06 = inarr.sel(bands="S2-L2A-B06")
-        b08 = inarr.sel(bands="S2-L2A-B08")
-        b11 = inarr.sel(bands="S2-L2A-B11")
-        b12 = inarr.sel(bands="S2-L2A-B12")
-
-        ndvi = (b08 - b04) / (b08 + b04)
-        ndwi = (b03 - b08) / (b03 + b08)
-        ndmi = (b08 - b11) / (b08 + b11)
-        ndre = (b05 - b08) / (b05 + b08)
-        ndre5 = (b06 - b08) / (b06 + b08)
-
-        indices = [ndvi, ndwi, ndmi, ndre, ndre5, b11, b12]
-
-        quantile_arrays = []
-
-        for data in indices:
-            q01 = data.quantile(0.1, dim=["t"]).drop("quantile")
-            q05 = data.quantile(0.5, dim=["t"]).drop("quantile")
-            q09 = data.quantile(0.9, dim=["t"]).drop("quantile")
-            iqr = q09 - q01
-
-            quantile_arrays.extend([q01, q05, q09, iqr])
-
-        # Pack the quantile arrays into a single array
-        quantile_array = (
-            xr.concat(quantile_arrays, dim="bands")
-            .assign_coords({"bands": self.output_labels()})
-            .transpose("bands", "y", "x")
+        # Work in float32 from the start, avoiding any implicit float64 upcast
+        inarr = inarr.astype(np.float32, copy=False)
+
+        # Extract the raw buffers of the bands once, as (t, y, x) views of the
+        # (bands, t, y, x) array, resolving all the band positions at once
+        # instead of a label lookup per band
+        band_positions = inarr.indexes["bands"].get_indexer(self._INPUT_BANDS)
+        if (band_positions < 0).any():
+            missing_bands = [
+                band
+                for band, position in zip(self._INPUT_BANDS, band_positions)
+                if position < 0
+            ]
+            raise ValueError(f"Missing input bands: {missing_bands}")
+        arr = np.moveaxis(
+            inarr.values,
+            [inarr.get_axis_num(dim) for dim in ("bands", "t", "y", "x")],
+            [0, 1, 2, 3],
         )
+        b03, b04, b05, b06, b08, b11, b12 = (arr[pos] for pos in band_positions)
+
+        # Compute the normalized differences directly in a preallocated int16
+        # (indices, t, y, x) stack, reusing the same scratch buffers for all
+        # the indices to avoid allocating temporaries for every operation.
+        indices = np.empty((5, *b03.shape), dtype=np.int16)
+        numerator = np.empty(b03.shape, dtype=np.float32)
+        denominator = np.empty(b03.shape, dtype=np.float32)
+
+        normalized_differences = [
+            (b08, b04),  # NDVI
+            (b03, b08),  # NDWI
+            (b08, b11),  # NDMI
+            (b05, b08),  # NDRE
+            (b06, b08),  # NDRE5
+        ]
+        numexpr = self._get_numexpr()
+        for idx, (band_a, band_b) in enumerate(normalized_differences):
+            if numexpr is not None:
+                # Single multithreaded pass, without intermediate buffers
+                numexpr.evaluate(
+                    "(band_a - band_b) / (band_a + band_b) * scale",
+                    local_dict={
+                        "band_a": band_a,
+                        "band_b": band_b,
+                        "scale": np.float32(self.INDEX_SCALE),
+                    },
+                    out=numerator,
+                )
+            else:
+                np.subtract(band_a, band_b, out=numerator, dtype=np.float32)
+                np.add(band_a, band_b, out=denominator, dtype=np.float32)
+                np.divide(numerator, denominator, out=numerator)
+                np.multiply(numerator, self.INDEX_SCALE, out=numerator)
+            np.clip(numerator, -self.INDEX_SCALE, self.INDEX_SCALE, out=numerator)
+            np.rint(numerator, out=numerator)
+            numerator[np.isnan(numerator)] = self.INDEX_NODATA
+            np.copyto(indices[idx], numerator, casting="unsafe")
+
+        bands = np.stack([b11, b12]).astype(np.float32, copy=False)
 
-        return quantile_array
+        # Preallocate the (indices, [q10, q50, q90, IQR], y, x) output, which is
+        # flattened to the output bands without any copy
+        features = np.empty((7, 4, *b03.shape[1:]), dtype=np.float32)
+
+        # Compute all the quantiles over the time dimension at once
+        self._compute_quantiles(
+            indices, [0.1, 0.5, 0.9], features[:5, :3], nodata=self.INDEX_NODATA
+        )
+        features[:5, :3] *= 1 / self.INDEX_SCALE
+        self._compute_quantiles(bands, [0.1, 0.5, 0.9], features[5:, :3])
+        np.subtract(features[:, 2], features[:, 0], out=features[:, 3])
+
+        return xr.DataArray(
+            features.reshape(-1, *b03.shape[1:]),
+            dims=["bands", "y", "x"],
+            coords={
+                "bands": self.output_labels(),
+                "y": inarr.coords["y"],
+                "x": inarr.coords["x"],
+            },
+        )
 
 
 if __name__ == "__main__":
@@ -137,14 +330,16 @@ if __name__ == "__main__":
         ],
     )
 
-    # Start the job
+    # Start the job. The features do not have a time dimension anymore and are
+    # written as a GeoTIFF, which the backend writes in parallel per tile
+    # instead of through a single NetCDF writer.
     job = features.create_job(
-        title="Quantile indices extraction - Tervuren Park", out_format="NetCDF"
+        title="Quantile indices extraction - Tervuren Park", out_format="GTiff"
     )
 
     job.start_and_wait()
 
     # Download the results
     for asset in job.get_results().get_assets():
-        if asset.metadata["type"].startswith("application/x-netcdf"):
-            asset.download("/data/users/Public/couchard/test_features.nc")
+        if asset.metadata["type"].startswith("image/tiff"):
+            asset.download("/data/users/Public/couchard/test_features.tif")
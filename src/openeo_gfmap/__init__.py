@@ -6,11 +6,28 @@ by leveraging the power of OpenEO (http://openeo.org/).
 More information available in the README.md file.
 """
 
-from .backend import Backend, BackendContext
-from .fetching import FetchType
-from .metadata import FakeMetadata
-from .spatial import BoundingBoxExtent, SpatialContext
-from .temporal import TemporalContext
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .backend import Backend, BackendContext
+    from .fetching import FetchType
+    from .metadata import FakeMetadata
+    from .spatial import BoundingBoxExtent, SpatialContext
+    from .temporal import TemporalContext
+
+# The public objects are imported from their submodule on first access, so
+# that importing a single submodule (e.g. in UDFs) does not load openeo and
+# the fetching logic.
+_LAZY_IMPORTS = {
+    "Backend": ".backend",
+    "BackendContext": ".backend",
+    "FetchType": ".fetching",
+    "FakeMetadata": ".metadata",
+    "BoundingBoxExtent": ".spatial",
+    "SpatialContext": ".spatial",
+    "TemporalContext": ".temporal",
+}
 
 __all__ = [
     "Backend",
@@ -21,3 +38,20 @@ __all__ = [
     "FakeMetadata",
     "FetchType",
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    elif f".{name}" in _LAZY_IMPORTS.values():
+        # Submodules previously loaded by the eager imports
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Caches the object in the module namespace for the next accesses
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,13 +3,15 @@
 Defines on which backend the pipeline is being currently used.
 """
 
+import functools
 import logging
 import os
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, Dict, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
 
-import openeo
+if TYPE_CHECKING:
+    import openeo
 
 _log = logging.getLogger(__name__)
 
@@ -25,16 +27,39 @@ class Backend(Enum):
     FED = "fed"  # Federation backend
 
 
-@dataclass
+@dataclass(frozen=True)
 class BackendContext:
     """Backend context and information.
 
     Containing backend related information useful for the framework to
-    adapt the process graph.
+    adapt the process graph. The context is immutable and hashable, so that
+    it can be used as a key of lookup tables.
     """
 
+    # Explicit slots, as `dataclass(slots=True)` requires Python 3.10
+    __slots__ = ("backend",)
+
     backend: Backend
 
+    # Pickling support, the default slots state being restored with
+    # `setattr`, which is not allowed on frozen dataclasses
+    def __getstate__(self):
+        return (self.backend,)
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "backend", state[0])
+
+
+def _env_keys(env_var_suffix: str) -> Tuple[str, str, str]:
+    """Returns the names of the environment variables holding the client
+    credentials for the given suffix.
+    """
+    return (
+        f"OPENEO_AUTH_CLIENT_ID_{env_var_suffix}",
+        f"OPENEO_AUTH_CLIENT_SECRET_{env_var_suffix}",
+        f"OPENEO_AUTH_PROVIDER_ID_{env_var_suffix}",
+    )
+
 
 def _create_connection(
     url: str, *, env_var_suffix: str, connect_kwargs: Optional[dict] = None
@@ -43,16 +68,22 @@ def _create_connection(
     Generic helper to create an openEO connection
     with support for multiple client credential configurations from environment variables
     """
+    # Imported here, so that the Backend definitions can be used without
+    # loading the openeo client
+    import openeo
+
     connection = openeo.connect(url, **(connect_kwargs or {}))
 
+    client_id_key, client_secret_key, provider_id_key = _env_keys(env_var_suffix)
+
     if (
         os.environ.get("OPENEO_AUTH_METHOD") == "client_credentials"
-        and f"OPENEO_AUTH_CLIENT_ID_{env_var_suffix}" in os.environ
+        and client_id_key in os.environ
     ):
         # Support for multiple client credentials configs from env vars
-        client_id = os.environ[f"OPENEO_AUTH_CLIENT_ID_{env_var_suffix}"]
-        client_secret = os.environ[f"OPENEO_AUTH_CLIENT_SECRET_{env_var_suffix}"]
-        provider_id = os.environ.get(f"OPENEO_AUTH_PROVIDER_ID_{env_var_suffix}")
+        client_id = os.environ[client_id_key]
+        client_secret = os.environ[client_secret_key]
+        provider_id = os.environ.get(provider_id_key)
         _log.info(
             f"Doing client credentials from env var with {env_var_suffix=} {provider_id} {client_id=} {len(client_secret)=} "
         )
@@ -73,7 +104,8 @@ def _create_connection(
     return connection
 
 
-def vito_connection() -> openeo.Connection:
+@functools.lru_cache(maxsize=None)
+def vito_connection() -> "openeo.Connection":
     """Performs a connection to the VITO backend using the oidc authentication."""
     return _create_connection(
         url="openeo.vito.be",
@@ -81,7 +113,8 @@ def vito_connection() -> openeo.Connection:
     )
 
 
-def cdse_connection() -> openeo.Connection:
+@functools.lru_cache(maxsize=None)
+def cdse_connection() -> "openeo.Connection":
     """Performs a connection to the CDSE backend using oidc authentication."""
     return _create_connection(
         url="openeo.dataspace.copernicus.eu",
@@ -89,7 +122,8 @@ def cdse_connection() -> openeo.Connection:
     )
 
 
-def cdse_staging_connection() -> openeo.Connection:
+@functools.lru_cache(maxsize=None)
+def cdse_staging_connection() -> "openeo.Connection":
     """Performs a connection to the CDSE backend using oidc authentication."""
     return _create_connection(
         url="openeo-staging.dataspace.copernicus.eu",
@@ -97,7 +131,8 @@ def cdse_staging_connection() -> openeo.Connection:
     )
 
 
-def eodc_connection() -> openeo.Connection:
+@functools.lru_cache(maxsize=None)
+def eodc_connection() -> "openeo.Connection":
     """Perfroms a connection to the EODC backend using the oidc authentication."""
     return _create_connection(
         url="https://openeo.eodc.eu/openeo/1.1.0",
@@ -105,7 +140,8 @@ def eodc_connection() -> openeo.Connection:
     )
 
 
-def fed_connection() -> openeo.Connection:
+@functools.lru_cache(maxsize=None)
+def fed_connection() -> "openeo.Connection":
     """Performs a connection to the OpenEO federated backend using the oidc
     authentication."""
     return _create_connection(
@@ -114,6 +150,9 @@ def fed_connection() -> openeo.Connection:
     )
 
 
+# The connection functions are cached, so that a single authenticated connection
+# is created per backend and process. The cache can be reset through their
+# `cache_clear` method, for example to authenticate again.
 BACKEND_CONNECTIONS: Dict[Backend, Callable] = {
     Backend.TERRASCOPE: vito_connection,
     Backend.CDSE: cdse_connection,
@@ -2,12 +2,18 @@
 implementation of feature extractors of a UDF.
 """
 
+import ast
 import functools
 import inspect
 import logging
+import os
 import re
 import shutil
+import sys
+import tempfile
+import textwrap
 import urllib.request
+import zipfile
 from abc import ABC, abstractmethod
 from pathlib import Path
 
@@ -16,8 +22,6 @@ import openeo
 import xarray as xr
 from openeo.udf import XarrayDataCube
 from openeo.udf.udf_data import UdfData
-from pyproj import Transformer
-from pyproj.crs import CRS
 
 LAT_HARMONIZED_NAME = "GEO-LAT"
 LON_HARMONIZED_NAME = "GEO-LON"
@@ -30,8 +34,33 @@ class FeatureExtractor(ABC):
 
     The inherited classes are supposed to take care of VectorDataCubes for
     point based extraction or dense Cubes for tile/polygon based extraction.
+
+    Numeric per-pixel computations can be compiled with numba, by returning
+    `"numba"` in the `dependencies` method and importing it with the
+    `_get_numba` method, for example in a method compiling a
+    `@numba.njit(parallel=True)` kernel on first use. As the UDF code has no
+    source file, the kernels defined in the class cannot be cached with
+    `cache=True` and are compiled once per worker. The functions of the
+    installed dependencies are cached in the directory given by the
+    `NUMBA_CACHE_DIR` environment variable, which defaults to a directory
+    shared by the workers when numba is imported by `_get_numba`.
+
+    Within a worker process, the successive UDF calls share a single instance
+    of the feature extractor. Any state set on the instance during a call is
+    therefore still present in the next calls, unless it is cleared by the
+    `reset_for_call` method, called before every call. Feature extractors
+    keeping state that can't be reset can unset `REUSE_INSTANCE` to get a new
+    instance on every call instead.
     """
 
+    # If unset, a new instance of the feature extractor is created on every
+    # UDF call, instead of reusing the same instance within a worker.
+    REUSE_INSTANCE = True
+
+    # Optional numexpr and numba modules, imported on first use
+    _numexpr = None
+    _numba = None
+
     def __init__(self) -> None:
         self._epsg = None
 
@@ -61,12 +90,15 @@ class FeatureExtractor(ABC):
         # Create the directory if it doesn't exist
         dependencies_dir.mkdir(exist_ok=True, parents=True)
 
-        # Download and extract the model file
+        # Download and extract the model file. The archive is streamed in
+        # memory, or in a temporary file if too large, instead of being
+        # written in the dependencies folder and read again to unpack it.
         modelfile_url = f"{base_url}/{dependency_name}"
-        modelfile, _ = urllib.request.urlretrieve(
-            modelfile_url, filename=dependencies_dir / Path(modelfile_url).name
-        )
-        shutil.unpack_archive(modelfile, extract_dir=dependencies_dir)
+        with tempfile.SpooledTemporaryFile(max_size=2**28) as archive_file:
+            with urllib.request.urlopen(modelfile_url) as response:
+                shutil.copyfileobj(response, archive_file)
+            with zipfile.ZipFile(archive_file) as archive:
+                archive.extractall(dependencies_dir)
 
         # Add the model directory to system path if it's not already there
         abs_path = str(
@@ -75,6 +107,70 @@ class FeatureExtractor(ABC):
 
         return abs_path
 
+    @classmethod
+    def _get_numexpr(cls):
+        """Returns the numexpr module, or None if it is not installed in the
+        environment. Numexpr evaluates array expressions in a single
+        multithreaded pass, without intermediate buffers.
+        """
+        if cls._numexpr is None:
+            try:
+                import numexpr
+            except ImportError:
+                numexpr = False
+            cls._numexpr = numexpr
+        return cls._numexpr or None
+
+    @classmethod
+    def _get_numba(cls):
+        """Returns the numba module, or None if it is not installed in the
+        environment. Unless set otherwise, the `NUMBA_CACHE_DIR` environment
+        variable is set before numba is first imported, so that the compiled
+        functions of the installed dependencies are cached in a writable
+        directory shared by the workers.
+        """
+        if cls._numba is None:
+            if "numba" not in sys.modules:
+                os.environ.setdefault(
+                    "NUMBA_CACHE_DIR",
+                    os.path.join(tempfile.gettempdir(), "numba_cache"),
+                )
+            try:
+                import numba
+            except ImportError:
+                numba = False
+            cls._numba = numba
+        return cls._numba or None
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_shared_instance(cls) -> "FeatureExtractor":
+        """Returns the instance of the feature extractor shared by the
+        successive UDF calls within a worker process.
+        """
+        return cls()
+
+    @classmethod
+    def _get_instance(cls) -> "FeatureExtractor":
+        """Returns the instance of the feature extractor running an UDF call.
+        The instance is shared by the successive calls within a worker process
+        if `REUSE_INSTANCE` is set, so that the initialization of the feature
+        extractor is only done once, and reset with `reset_for_call`. The
+        state of the call, such as the EPSG code and the parameters, is set
+        again by `_common_preparations`.
+        """
+        if not cls.REUSE_INSTANCE:
+            return cls()
+        instance = cls._get_shared_instance()
+        instance.reset_for_call()
+        return instance
+
+    def reset_for_call(self) -> None:
+        """Resets the state set on the instance by the previous UDF call, before
+        the shared instance is used again. Does nothing by default, to be
+        overriden by the feature extractors keeping state between methods.
+        """
+
     def _common_preparations(
         self, inarr: xr.DataArray, parameters: dict
     ) -> xr.DataArray:
@@ -82,7 +178,15 @@ class FeatureExtractor(ABC):
         executed. This method should be called by the `_execute` method of the
         feature extractor.
         """
-        self._epsg = parameters.pop(EPSG_HARMONIZED_NAME)
+        # The given parameters are left untouched, the EPSG code is only
+        # filtered out of the stored copy
+        self._epsg = parameters.get(EPSG_HARMONIZED_NAME)
+        if EPSG_HARMONIZED_NAME in parameters:
+            parameters = {
+                key: value
+                for key, value in parameters.items()
+                if key != EPSG_HARMONIZED_NAME
+            }
         self._parameters = parameters
         return inarr
 
@@ -130,44 +234,90 @@ class PatchFeatureExtractor(FeatureExtractor):
     implementing a feature extractor should take care of
     """
 
-    def get_latlons(self, inarr: xr.DataArray) -> xr.DataArray:
-        """Returns the latitude and longitude coordinates of the given array in
-        a dataarray. Returns a dataarray with the same width/height of the input
-        array, but with two bands, one for latitude and one for longitude. The
-        metadata coordinates of the output array are the same as the input
-        array, as the array wasn't reprojected but instead new features were
-        computed.
-
-        The latitude and longitude band names are standardized to the names
-        `LAT_HARMONIZED_NAME` and `LON_HARMONIZED_NAME` respectively.
+    # Order of the dimensions of the array given to the `execute` method.
+    # Feature extractors reducing the time series of every pixel can use
+    # ("bands", "y", "x", "t") to iterate over the time dimension last.
+    # Inputs in another order are given as a transposed view of the input,
+    # without any copy, for the default layout. For any other layout, they are
+    # copied once into a contiguous array of this layout.
+    PREFERRED_LAYOUT = ("bands", "t", "y", "x")
+
+    # If set, inputs in another order are also copied once into a contiguous
+    # array of the default layout, instead of being given as a transposed view.
+    CONTIGUOUS = False
+
+    # If set, the `execute` method receives the raw numpy array instead of the
+    # DataArray, and returns a (bands, y, x) numpy array labelled afterwards
+    # with the output labels and the input coordinates.
+    RAW_NDARRAY = False
+
+    # If set, dask backed inputs are computed once before being given to the
+    # `execute` method, instead of on every access within the user kernel.
+    EAGER = True
+
+    # If unset, the time dimension of single timestep inputs is squeezed
+    # before being given to the `execute` method.
+    EXPECTS_T = True
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _get_transformer(epsg_from: int, epsg_to: int = 4326):
+        """Returns the pyproj reprojection object between the two EPSG codes.
+        Cached, as initializing the transformer from the PROJ database is
+        costly compared to the reprojection of the coordinates of a tile.
+        Defined on the class, as only the class source is packed in the UDF.
+        pyproj is only imported here, when a reprojection is required.
         """
+        from pyproj import Transformer
+        from pyproj.crs import CRS
 
-        lon = inarr.coords["x"]
-        lat = inarr.coords["y"]
-        lon, lat = np.meshgrid(lon, lat)
+        return Transformer.from_crs(
+            crs_from=CRS.from_epsg(epsg_from),
+            crs_to=CRS.from_epsg(epsg_to),
+            always_xy=True,
+        )
 
+    def get_latlons_array(self, inarr: xr.DataArray) -> np.ndarray:
+        """Returns the latitude and longitude coordinates of the given array as
+        a (2, y, x) float32 numpy array, the first channel being the latitude
+        and the second the longitude. Cheaper than `get_latlons` when the coordinates
+        of the output are not needed.
+        """
         if self.epsg is None:
             raise Exception(
                 "EPSG code was not defined, cannot extract lat/lon array "
                 "as the CRS is unknown."
             )
 
+        # Fill the two channel array of the lat and lons by broadcasting the
+        # coordinates in a single buffer, instead of stacking a meshgrid
+        latlon = np.empty((2, inarr.sizes["y"], inarr.sizes["x"]), dtype=np.float64)
+        latlon[0] = inarr.coords["y"].values[:, np.newaxis]
+        latlon[1] = inarr.coords["x"].values[np.newaxis, :]
+
         # If the coordiantes are not in EPSG:4326, we need to reproject them
         if self.epsg != 4326:
-            # Initializes a pyproj reprojection object
-            transformer = Transformer.from_crs(
-                crs_from=CRS.from_epsg(self.epsg),
-                crs_to=CRS.from_epsg(4326),
-                always_xy=True,
-            )
-            lon, lat = transformer.transform(xx=lon, yy=lat)
+            transformer = self._get_transformer(self.epsg)
+            # Reprojects the coordinates in place, within the same buffer
+            transformer.transform(xx=latlon[1], yy=latlon[0], inplace=True)
+
+        # The projection is computed in float64, but float32 is precise enough
+        # for the resulting degrees (below the meter) and halves their size
+        return latlon.astype(np.float32)
 
-        # Create a two channel numpy array of the lat and lons together by stacking
-        latlon = np.stack([lat, lon])
+    def get_latlons(self, inarr: xr.DataArray) -> xr.DataArray:
+        """Returns the latitude and longitude coordinates of the given array in
+        a dataarray. Returns a dataarray with the same width/height of the input
+        array, but with two bands, one for latitude and one for longitude. The
+        metadata coordinates of the output array are the same as the input
+        array, as the array wasn't reprojected but instead new features were
+        computed.
 
-        # Repack in a dataarray
+        The latitude and longitude band names are standardized to the names
+        `LAT_HARMONIZED_NAME` and `LON_HARMONIZED_NAME` respectively.
+        """
         return xr.DataArray(
-            latlon,
+            self.get_latlons_array(inarr),
             dims=["bands", "y", "x"],
             coords={
                 "bands": [LAT_HARMONIZED_NAME, LON_HARMONIZED_NAME],
@@ -183,42 +333,99 @@ class PatchFeatureExtractor(FeatureExtractor):
         if the parameter `rescale_s1` is set to False.
         """
         s1_bands = ["S1-SIGMA0-VV", "S1-SIGMA0-VH", "S1-SIGMA0-HV", "S1-SIGMA0-HH"]
-        s1_bands_to_select = list(set(arr.bands.values) & set(s1_bands))
+        # Positions of the S1 bands, in the order of the input array
+        s1_band_indices = np.flatnonzero(np.isin(arr.bands.values, s1_bands))
 
-        if len(s1_bands_to_select) == 0:
+        if len(s1_band_indices) == 0:
             return arr
 
-        data_to_rescale = arr.sel(bands=s1_bands_to_select).astype(np.float32).data
-
-        # Assert that the values are set between 1 and 65535
-        if data_to_rescale.min().item() < 1 or data_to_rescale.max().item() > 65535:
-            raise ValueError(
-                "The input array should be in uint16 format, with values between 1 and 65535. "
-                "This restriction assures that the data was processed according to the S1 fetcher "
-                "preprocessor. The user can disable this scaling manually by setting the "
-                "`rescale_s1` parameter to False in the feature extractor."
-            )
-
-        # Converting back to power values
-        data_to_rescale = 20.0 * np.log10(data_to_rescale) - 83.0
-        data_to_rescale = np.power(10, data_to_rescale / 10.0)
-        data_to_rescale[~np.isfinite(data_to_rescale)] = np.nan
+        rescale_in_place = isinstance(arr.data, np.ndarray) and arr.dtype == np.float32
+        if rescale_in_place:
+            # Views on the S1 bands of the array, rescaled without any copy
+            band_axis = arr.get_axis_num("bands")
+            bands_to_rescale = [
+                arr.data[(slice(None),) * band_axis + (index,)]
+                for index in s1_band_indices
+            ]
+        else:
+            bands_to_rescale = [arr.isel(bands=s1_band_indices).data]
+
+        # Assert that the values are set between 1 and 65535. The upper bound
+        # is guaranteed by the uint16 dtype, which saves a full scan.
+        for data_to_rescale in bands_to_rescale:
+            if data_to_rescale.min() < 1 or (
+                data_to_rescale.dtype != np.uint16 and data_to_rescale.max() > 65535
+            ):
+                raise ValueError(
+                    "The input array should be in uint16 format, with values between 1 and 65535. "
+                    "This restriction assures that the data was processed according to the S1 fetcher "
+                    "preprocessor. The user can disable this scaling manually by setting the "
+                    "`rescale_s1` parameter to False in the feature extractor."
+                )
+
+        # Converting to decibels. The round trip through power values,
+        # 10 * log10(10 ** ((20 * log10(x) - 83) / 10)), simplifies to
+        # 20 * log10(x) - 83. The validation doesn't see the values below 1
+        # of bands also containing NaN values, so the non-finite results are
+        # still masked as NaN.
+        if rescale_in_place:
+            numexpr = self._get_numexpr()
+            for data_to_rescale in bands_to_rescale:
+                if numexpr is not None:
+                    numexpr.evaluate(
+                        "20 * log10(x) - 83",
+                        local_dict={"x": data_to_rescale},
+                        out=data_to_rescale,
+                    )
+                else:
+                    np.log10(data_to_rescale, out=data_to_rescale)
+                    data_to_rescale *= 20.0
+                    data_to_rescale -= 83.0
+                data_to_rescale[~np.isfinite(data_to_rescale)] = np.nan
+            return arr
 
-        # Converting power values to decibels
-        data_to_rescale = 10.0 * np.log10(data_to_rescale)
+        data_to_rescale = np.log10(bands_to_rescale[0].astype(np.float32))
+        data_to_rescale *= 20.0
+        data_to_rescale -= 83.0
+        data_to_rescale = np.where(
+            np.isfinite(data_to_rescale), data_to_rescale, np.float32(np.nan)
+        )
 
         # Change the bands within the array
-        arr.loc[dict(bands=s1_bands_to_select)] = data_to_rescale
+        arr[dict(bands=s1_band_indices)] = data_to_rescale
         return arr
 
-    # TODO to remove the fixed transpose as it contributes to unclear code.
     def _execute(self, cube: XarrayDataCube, parameters: dict) -> XarrayDataCube:
-        arr = cube.get_array().transpose("bands", "t", "y", "x")
+        arr = cube.get_array()
+        if self.EAGER and not isinstance(arr.data, np.ndarray):
+            arr = arr.compute()
+        if arr.dims != self.PREFERRED_LAYOUT:
+            arr = arr.transpose(*self.PREFERRED_LAYOUT)
+            contiguous = self.CONTIGUOUS or (
+                self.PREFERRED_LAYOUT != PatchFeatureExtractor.PREFERRED_LAYOUT
+            )
+            if contiguous and isinstance(arr.data, np.ndarray):
+                # Single copy making the array contiguous in the requested
+                # layout, instead of a strided view of the original one
+                arr = arr.copy(data=np.ascontiguousarray(arr.data))
         arr = self._common_preparations(arr, parameters)
         if self._parameters.get("rescale_s1", True):
             arr = self._rescale_s1_backscatter(arr)
-
-        arr = self.execute(arr).transpose("bands", "y", "x")
+        if not self.EXPECTS_T and arr.sizes["t"] == 1:
+            arr = arr.squeeze("t")
+
+        if self.RAW_NDARRAY:
+            arr = xr.DataArray(
+                self.execute(arr.values),
+                dims=["bands", "y", "x"],
+                coords={
+                    "bands": self.output_labels(),
+                    "y": arr.coords["y"],
+                    "x": arr.coords["x"],
+                },
+            )
+        else:
+            arr = self.execute(arr).transpose("bands", "y", "x")
         return XarrayDataCube(arr)
 
     @abstractmethod
@@ -233,11 +440,15 @@ class PointFeatureExtractor(FeatureExtractor):
         )
 
     def _execute(self, cube: XarrayDataCube, parameters: dict) -> XarrayDataCube:
-        arr = cube.get_array().transpose("bands", "t")
+        arr = cube.get_array()
+        if arr.dims != ("bands", "t"):
+            arr = arr.transpose("bands", "t")
 
         arr = self._common_preparations(arr, parameters)
 
-        outarr = self.execute(cube.to_array()).transpose("bands", "t")
+        outarr = self.execute(arr)
+        if outarr.dims != ("bands", "t"):
+            outarr = outarr.transpose("bands", "t")
         return XarrayDataCube(outarr)
 
     @abstractmethod
@@ -248,8 +459,8 @@ class PointFeatureExtractor(FeatureExtractor):
 def apply_udf_data(udf_data: UdfData) -> XarrayDataCube:
     feature_extractor_class = "<feature_extractor_class>"
 
-    # User-defined, feature extractor class initialized here
-    feature_extractor = feature_extractor_class()
+    # User-defined, feature extractor class initialized once per worker
+    feature_extractor = feature_extractor_class._get_instance()
 
     is_pixel_based = issubclass(feature_extractor_class, PointFeatureExtractor)
 
@@ -282,13 +493,17 @@ def _get_imports() -> str:
 
     imports = []
     static_globals = []
+    # Compiled here rather than as a module constant, as UPPER_CASE module
+    # globals are themselves copied in the UDF
+    global_assignment = re.compile(r"^[A-Z_0-9]+\s*=")
 
     for line in lines:
-        if line.strip().startswith(("import ", "from ")):
+        # Only the module level imports, the local imports staying local
+        if line.startswith(("import ", "from ")):
             imports.append(line)
         # All the global variables with the style
         # UPPER_CASE_GLOBAL_VARIABLE = "constant"
-        elif re.match("^[A-Z_0-9]+\s*=.*$", line):
+        elif global_assignment.match(line):
             static_globals.append(line)
 
     return "\n".join(imports) + "\n\n" + "\n".join(static_globals)
@@ -301,37 +516,79 @@ def _get_apply_udf_data(feature_extractor: FeatureExtractor) -> str:
     return source.replace('"<feature_extractor_class>"', feature_extractor.__name__)
 
 
+def _strip_source(source: str) -> str:
+    """Removes the docstrings and comments from the given source code, to
+    reduce the size of the generated UDF. The source is returned unchanged on
+    Python versions without `ast.unparse` (< 3.9).
+    """
+    if not hasattr(ast, "unparse"):
+        return source
+
+    tree = ast.parse(textwrap.dedent(source))
+    for node in ast.walk(tree):
+        if not isinstance(
+            node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        ):
+            continue
+        body = node.body
+        if (
+            body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            # Keeps a valid body for classes and functions with only a docstring
+            node.body = body[1:] or [ast.Pass()]
+
+    # Comments are not part of the syntax tree
+    return ast.unparse(tree)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_base_udf_code() -> str:
+    """Returns the part of the UDF code that does not depend on the user
+    defined feature extractor: the imports of this file and the source of
+    the base classes. Built only once, as it never changes.
+    """
+    return "\n\n".join(
+        [
+            _get_imports(),
+            _strip_source(inspect.getsource(FeatureExtractor)),
+            _strip_source(inspect.getsource(PatchFeatureExtractor)),
+            _strip_source(inspect.getsource(PointFeatureExtractor)),
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=None)
 def _generate_udf_code(
-    feature_extractor_class: FeatureExtractor, dependencies: list
-) -> openeo.UDF:
+    feature_extractor_class: FeatureExtractor, dependencies: tuple
+) -> str:
     """Generates the udf code by packing imports of this file, the necessary
     superclass and subclasses as well as the user defined feature extractor
     class and the apply_datacube function.
-    """
-
-    # UDF code that will be built here
-    udf_code = ""
 
+    The generated code is cached per feature extractor class and
+    dependencies, which must therefore be given as a tuple.
+    """
     assert issubclass(
         feature_extractor_class, FeatureExtractor
     ), "The feature extractor class must be a subclass of FeatureExtractor."
 
-    dependencies_code = ""
-    dependencies_code += "# /// script\n"
-    dependencies_code += "# dependencies = [\n"
-    for dep in dependencies:
-        dependencies_code += f'#  "{dep}",\n'
-    dependencies_code += "# ]\n"
-    dependencies_code += "# ///\n"
+    dependencies_code = "\n".join(
+        ["# /// script", "# dependencies = ["]
+        + [f'#  "{dep}",' for dep in dependencies]
+        + ["# ]", "# ///"]
+    )
 
-    udf_code += dependencies_code + "\n"
-    udf_code += _get_imports() + "\n\n"
-    udf_code += f"{inspect.getsource(FeatureExtractor)}\n\n"
-    udf_code += f"{inspect.getsource(PatchFeatureExtractor)}\n\n"
-    udf_code += f"{inspect.getsource(PointFeatureExtractor)}\n\n"
-    udf_code += f"{inspect.getsource(feature_extractor_class)}\n\n"
-    udf_code += _get_apply_udf_data(feature_extractor_class)
-    return udf_code
+    return "\n\n".join(
+        [
+            dependencies_code,
+            _get_base_udf_code(),
+            _strip_source(inspect.getsource(feature_extractor_class)),
+            _strip_source(_get_apply_udf_data(feature_extractor_class)),
+        ]
+    )
 
 
 def apply_feature_extractor(
@@ -355,7 +612,7 @@ def apply_feature_extractor(
     output_labels = feature_extractor.output_labels()
     dependencies = feature_extractor.dependencies()
 
-    udf_code = _generate_udf_code(feature_extractor_class, dependencies)
+    udf_code = _generate_udf_code(feature_extractor_class, tuple(dependencies))
 
     udf = openeo.UDF(code=udf_code, context=parameters)
 
@@ -364,12 +621,24 @@ def apply_feature_extractor(
 
 
 def apply_feature_extractor_local(
-    feature_extractor_class: FeatureExtractor, cube: xr.DataArray, parameters: dict
+    feature_extractor_class: FeatureExtractor,
+    cube: xr.DataArray,
+    parameters: dict,
+    chunked: bool = False,
+    overlap: int = 0,
 ) -> xr.DataArray:
     """Applies and user-defined feature extractor, but locally. The
     parameters are the same as in the `apply_feature_extractor` function,
     excepts for the cube parameter which expects a `xarray.DataArray` instead of
     a `openeo.rest.datacube.DataCube` object.
+
+    If `chunked` is set, dask backed cubes are processed lazily by the patch
+    feature extractors, every spatial chunk being executed independently and
+    in parallel, similarly to the tiling performed by `apply_neighborhood` on
+    the backend. Feature extractors using the spatial context of the pixels
+    must then specify the `overlap`, in pixels, added on every side of the
+    chunks and cropped from their results. The first chunk is executed
+    immediately to determine the data type of the output.
     """
     # Trying to get the local EPSG code
     if EPSG_HARMONIZED_NAME not in parameters:
@@ -389,10 +658,69 @@ def apply_feature_extractor_local(
             "dependencies will not be installed."
         )
 
-    cube = XarrayDataCube(cube)
+    def _execute_block(block: xr.DataArray) -> xr.DataArray:
+        return (
+            feature_extractor._execute(XarrayDataCube(block), parameters)
+            .get_array()
+            .assign_coords({"bands": output_labels})
+        )
+
+    if (
+        not chunked
+        or cube.chunks is None
+        or not isinstance(feature_extractor, PatchFeatureExtractor)
+    ):
+        return _execute_block(cube)
+
+    import dask
+    import dask.array as da
+
+    cube = cube.chunk({"bands": -1, "t": -1})
+
+    def _execute_tile(tile: xr.DataArray, y_crop: slice, x_crop: slice) -> np.ndarray:
+        return _execute_block(tile).isel(y=y_crop, x=x_crop).values
+
+    def _delayed_tile(y_start: int, y_size: int, x_start: int, x_size: int):
+        # The chunk is executed with the overlap of its neighbours, and cropped
+        # back to its own extent afterwards
+        y_halo = min(overlap, y_start)
+        x_halo = min(overlap, x_start)
+        tile = cube.isel(
+            y=slice(y_start - y_halo, y_start + y_size + overlap),
+            x=slice(x_start - x_halo, x_start + x_size + overlap),
+        )
+        return dask.delayed(_execute_tile)(
+            tile, slice(y_halo, y_halo + y_size), slice(x_halo, x_halo + x_size)
+        )
 
-    return (
-        feature_extractor._execute(cube, parameters)
-        .get_array()
-        .assign_coords({"bands": output_labels})
+    # (start, size) of the chunks along the spatial dimensions
+    y_chunks = list(
+        zip(np.cumsum((0,) + cube.chunksizes["y"][:-1]), cube.chunksizes["y"])
+    )
+    x_chunks = list(
+        zip(np.cumsum((0,) + cube.chunksizes["x"][:-1]), cube.chunksizes["x"])
+    )
+
+    tiles = [
+        [_delayed_tile(*y_chunk, *x_chunk) for x_chunk in x_chunks]
+        for y_chunk in y_chunks
+    ]
+
+    # The first chunk is executed immediately to determine the output type
+    first_tile = tiles[0][0].compute()
+    blocks = [
+        [
+            da.from_delayed(
+                tile, shape=(len(output_labels), y_size, x_size), dtype=first_tile.dtype
+            )
+            for tile, (_, x_size) in zip(row, x_chunks)
+        ]
+        for row, (_, y_size) in zip(tiles, y_chunks)
+    ]
+    blocks[0][0] = da.from_array(first_tile)
+
+    return xr.DataArray(
+        da.block(blocks),
+        dims=["bands", "y", "x"],
+        coords={"bands": output_labels, "y": cube.coords["y"], "x": cube.coords["x"]},
     )
@@ -2,21 +2,36 @@
 Common internal operations within collection extraction logic, such as reprojection.
 """
 
-from functools import partial
+import re
+from functools import lru_cache
 from typing import Dict, Optional, Sequence, Union
 
 import openeo
 from geojson import GeoJSON
 from openeo.api.process import Parameter
+from openeo.metadata import MetadataException
 from openeo.rest.connection import InputDate
 from pyproj.crs import CRS
 from pyproj.exceptions import CRSError
+from shapely.geometry import GeometryCollection, shape
 
 from openeo_gfmap.spatial import BoundingBoxExtent, SpatialContext
 from openeo_gfmap.temporal import TemporalContext
 
 from .fetching import FetchType
 
+_URL_PREFIXES = ("http://", "https://")
+# Parquet files, with an optional query string after the extension
+_PARQUET_URL_RE = re.compile(r"\.(geo)?parquet(\?|$)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _reverse_band_mapping(band_items: tuple) -> dict:
+    """Returns the reversed mapping of the given (key, value) band name pairs,
+    cached as the same collection mappings are converted for every fetch.
+    """
+    return {v: k for k, v in band_items}
+
 
 def convert_band_names(desired_bands: list, band_dict: dict) -> list:
     """Renames the desired bands to the band names of the collection specified
@@ -37,8 +52,16 @@ def convert_band_names(desired_bands: list, band_dict: dict) -> list:
         List of band names within the backend collection names.
     """
     # Reverse the dictionarry
-    band_dict = {v: k for k, v in band_dict.items()}
-    return [band_dict[band] for band in desired_bands]
+    reversed_band_dict = _reverse_band_mapping(tuple(band_dict.items()))
+    return [reversed_band_dict[band] for band in desired_bands]
+
+
+@lru_cache(maxsize=512)
+def _validate_epsg(epsg_code: int) -> None:
+    """Checks that the EPSG code is valid, raising a CRSError otherwise. Valid
+    codes are cached, as parsing the CRS from the PROJ database is costly.
+    """
+    CRS.from_epsg(epsg_code)
 
 
 def resample_reproject(
@@ -54,7 +77,7 @@ def resample_reproject(
     if epsg_code is not None:
         # Checks that the code is valid
         try:
-            CRS.from_epsg(int(epsg_code))
+            _validate_epsg(int(epsg_code))
         except (CRSError, ValueError) as exc:
             raise ValueError(
                 f"Specified target_crs: {epsg_code} is not a valid " "EPSG code."
@@ -68,17 +91,67 @@ def resample_reproject(
 def rename_bands(datacube: openeo.DataCube, mapping: dict) -> openeo.DataCube:
     """Rename the bands from the given mapping scheme"""
 
-    # Filter out bands that are not part of the datacube
-    def filter_condition(band_name, _):
-        return band_name in datacube.metadata.band_names
+    # Filter out bands that are not part of the datacube, reading the band
+    # names of the metadata only once
+    band_names = set(datacube.metadata.band_names)
+    mapping = {k: v for k, v in mapping.items() if k in band_names}
 
-    mapping = {k: v for k, v in mapping.items() if filter_condition(k, v)}
+    # Skip the rename_labels process when the bands already have the target names
+    if mapping and all(k == v for k, v in mapping.items()):
+        return datacube
 
     return datacube.rename_labels(
         dimension="bands", target=list(mapping.values()), source=list(mapping.keys())
     )
 
 
+def _feature_collection_extent(feature_collection: dict) -> Optional[dict]:
+    """Returns the bounding box of all the geometries of the given GeoJSON
+    FeatureCollection as a spatial extent of the load_collection process, in
+    the CRS given by the `crs` member of the FeatureCollection, or in EPSG:4326
+    by default. Returns None if the FeatureCollection has no geometry, or if
+    its CRS can't be determined, in which case the full extent is loaded.
+    """
+    # Features without geometry are allowed by the GeoJSON specification
+    geometries = [
+        shape(feature["geometry"])
+        for feature in feature_collection["features"]
+        if feature.get("geometry") is not None
+    ]
+    if len(geometries) == 0:
+        return None
+
+    crs = feature_collection.get("crs")
+    if crs is None:
+        epsg_code = 4326
+    else:
+        try:
+            crs = CRS.from_user_input(crs["properties"]["name"])
+        except (CRSError, KeyError, TypeError):
+            return None
+        # OGC:CRS84 is the longitude/latitude order of EPSG:4326
+        if crs.equals(CRS.from_epsg(4326), ignore_axis_order=True):
+            epsg_code = 4326
+        else:
+            epsg_code = crs.to_epsg()
+    if epsg_code is None:
+        return None
+
+    west, south, east, north = GeometryCollection(geometries).bounds
+    if epsg_code == 4326 and not (
+        -180 <= west <= east <= 180 and -90 <= south <= north <= 90
+    ):
+        # Projected coordinates, without the crs member describing them
+        return None
+    return {
+        "west": west,
+        "south": south,
+        "east": east,
+        "north": north,
+        "crs": epsg_code,
+    }
+
+
 def _load_collection_hybrid(
     connection: openeo.Connection,
     is_stac: bool,
@@ -104,10 +177,63 @@ def _load_collection_hybrid(
         bands=bands,
         properties=properties,
     )
+    # The labels are only renamed if the metadata doesn't already list the
+    # given band names in the same order
+    try:
+        if list(cube.metadata.band_names) == list(bands):
+            return cube
+    except (AttributeError, MetadataException):
+        pass
     cube = cube.rename_labels(dimension="bands", target=bands)
     return cube
 
 
+def _tile_load_extent(spatial_extent: SpatialContext) -> dict:
+    """Checks the spatial extent of a tile based fetch, and returns the spatial
+    extent to load."""
+    assert isinstance(
+        spatial_extent, BoundingBoxExtent
+    ), "Please provide only a bounding box for tile based fetching."
+    return dict(spatial_extent)
+
+
+def _point_load_extent(spatial_extent: SpatialContext) -> dict:
+    """Checks the spatial extent of a point based fetch, and returns the spatial
+    extent to load."""
+    assert isinstance(
+        spatial_extent, GeoJSON
+    ), "Please provide only a GeoJSON FeatureCollection for point based fetching."
+    assert (
+        spatial_extent["type"] == "FeatureCollection"
+    ), "Please provide a FeatureCollection type of GeoJSON"
+    return spatial_extent
+
+
+def _polygon_load_extent(spatial_extent: Union[SpatialContext, str]) -> Optional[dict]:
+    """Checks the spatial extent of a polygon based fetch, and returns the
+    spatial extent to load. Only the bounding box of GeoJSON polygons is
+    loaded, while the full collection extent is loaded for remote files.
+    """
+    if isinstance(spatial_extent, GeoJSON):
+        assert (
+            spatial_extent["type"] == "FeatureCollection"
+        ), "Please provide a FeatureCollection type of GeoJSON"
+        return _feature_collection_extent(spatial_extent)
+    if isinstance(spatial_extent, str):
+        assert spatial_extent.startswith(
+            _URL_PREFIXES
+        ), "Please provide a valid URL or a path to a GeoJSON file."
+        return None
+    raise ValueError("Please provide a valid URL to a GeoParquet or GeoJSON file.")
+
+
+_LOAD_EXTENT_FUNCTIONS = {
+    FetchType.TILE: _tile_load_extent,
+    FetchType.POINT: _point_load_extent,
+    FetchType.POLYGON: _polygon_load_extent,
+}
+
+
 # TODO; deprecated?
 def _load_collection(
     connection: openeo.Connection,
@@ -123,66 +249,45 @@ def _load_collection(
     on the fetch type.
     """
     load_collection_parameters = params.get("load_collection", {})
-    load_collection_method = partial(
-        _load_collection_hybrid, is_stac=is_stac, collection_id_or_url=collection_name
-    )
 
     if (
         temporal_extent is not None
     ):  # Can be ignored for intemporal collections such as DEM
         temporal_extent = [temporal_extent.start_date, temporal_extent.end_date]
 
-    if fetch_type == FetchType.TILE:
-        assert isinstance(
-            spatial_extent, BoundingBoxExtent
-        ), "Please provide only a bounding box for tile based fetching."
-        spatial_extent = dict(spatial_extent)
-        cube = load_collection_method(
-            connection=connection,
-            bands=bands,
-            spatial_extent=spatial_extent,
-            temporal_extent=temporal_extent,
-            properties=load_collection_parameters,
-        )
-    elif fetch_type == FetchType.POINT:
-        assert isinstance(
-            spatial_extent, GeoJSON
-        ), "Please provide only a GeoJSON FeatureCollection for point based fetching."
-        assert (
-            spatial_extent["type"] == "FeatureCollection"
-        ), "Please provide a FeatureCollection type of GeoJSON"
-        cube = load_collection_method(
-            connection=connection,
-            bands=bands,
-            spatial_extent=spatial_extent,
-            temporal_extent=temporal_extent,
-            properties=load_collection_parameters,
-        )
-    elif fetch_type == FetchType.POLYGON:
-        if isinstance(spatial_extent, GeoJSON):
-            assert (
-                spatial_extent["type"] == "FeatureCollection"
-            ), "Please provide a FeatureCollection type of GeoJSON"
-        elif isinstance(spatial_extent, str):
-            assert spatial_extent.startswith("https://") or spatial_extent.startswith(
-                "http://"
-            ), "Please provide a valid URL or a path to a GeoJSON file."
-        else:
-            raise ValueError(
-                "Please provide a valid URL to a GeoParquet or GeoJSON file."
-            )
-        cube = load_collection_method(
-            connection=connection,
-            bands=bands,
-            temporal_extent=temporal_extent,
-            properties=load_collection_parameters,
-        )
+    cube = _load_collection_hybrid(
+        connection=connection,
+        is_stac=is_stac,
+        collection_id_or_url=collection_name,
+        bands=bands,
+        spatial_extent=_LOAD_EXTENT_FUNCTIONS[fetch_type](spatial_extent),
+        temporal_extent=temporal_extent,
+        properties=load_collection_parameters,
+    )
 
-    # Adding the process graph updates for experimental features
+    # Adding the process graph updates for experimental features, on the
+    # loading process before any other process is appended
     if params.get("update_arguments") is not None:
         cube.result_node().update_arguments(**params["update_arguments"])
 
-    # Peforming pre-mask optimization
+    if fetch_type == FetchType.POLYGON:
+        # The spatial filter is applied right after loading, so that the
+        # following operations only process the pixels of the polygons
+        if isinstance(spatial_extent, str):
+            geometry = connection.load_url(
+                spatial_extent,
+                format=(
+                    "Parquet" if _PARQUET_URL_RE.search(spatial_extent) else "GeoJSON"
+                ),
+            )
+        else:
+            geometry = spatial_extent
+        cube = cube.filter_spatial(geometry)
+
+    # Peforming pre-mask optimization. The mask cube does not need to be
+    # clipped to the polygons, as masking keeps the extent of the masked cube.
+    # The pre-merge cube on the other hand is clipped below, otherwise merging
+    # it would extend the cube beyond the polygons.
     pre_mask = params.get("pre_mask", None)
     if pre_mask is not None:
         assert isinstance(pre_mask, openeo.DataCube), (
@@ -199,16 +304,8 @@ def _load_collection(
         )
         if pre_mask is not None:
             pre_merge_cube = pre_merge_cube.mask(pre_mask)
+        if fetch_type == FetchType.POLYGON:
+            pre_merge_cube = pre_merge_cube.filter_spatial(geometry)
         cube = cube.merge_cubes(pre_merge_cube)
 
-    if fetch_type == FetchType.POLYGON:
-        if isinstance(spatial_extent, str):
-            geometry = connection.load_url(
-                spatial_extent,
-                format="Parquet" if ".parquet" in spatial_extent else "GeoJSON",
-            )
-            cube = cube.filter_spatial(geometry)
-        else:
-            cube = cube.filter_spatial(spatial_extent)
-
     return cube
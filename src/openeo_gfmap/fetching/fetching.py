@@ -54,6 +54,8 @@ class CollectionFetcher:
         passed in the fetch and preprocessing function.
     """
 
+    __slots__ = ("backend_context", "bands", "fetcher", "processing", "params")
+
     def __init__(
         self,
         backend_context: BackendContext,
@@ -62,7 +64,7 @@ class CollectionFetcher:
         collection_preprocessing: Callable,
         **collection_params,
     ):
-        self.backend_contect = backend_context
+        self.backend_context = backend_context
         self.bands = bands
         self.fetcher = collection_fetch
         self.processing = collection_preprocessing
@@ -38,22 +38,31 @@ AGERA5_STAC_MAPPING = {
     "vapour_pressure": "AGERA5-VAPOUR",
     "wind_speed": "AGERA5-WIND",
 }
-KNOWN_UNTEMPORAL_COLLECTIONS = ["COPERNICUS_30"]
+KNOWN_UNTEMPORAL_COLLECTIONS = frozenset(["COPERNICUS_30"])
 
 AGERA5_TERRASCOPE_STAC = "https://stac.openeo.vito.be/collections/agera5_daily"
 
+# Band mappings of the known collections, indexed by (collection_name, is_stac)
+_BAND_MAPPINGS = {
+    ("COPERNICUS_30", False): BASE_DEM_MAPPING,
+    ("AGERA5", False): BASE_WEATHER_MAPPING,
+}
+
+
+def _resolve_mapping(collection_name: str, is_stac: bool) -> Optional[dict]:
+    """Returns the band mapping of a known collection, or None if the
+    collection is not known.
+    """
+    band_mapping = _BAND_MAPPINGS.get((collection_name, is_stac))
+    if band_mapping is None and is_stac and AGERA5_TERRASCOPE_STAC in collection_name:
+        band_mapping = AGERA5_STAC_MAPPING
+    return band_mapping
+
 
 def _get_generic_fetcher(
     collection_name: str, fetch_type: FetchType, backend: Backend, is_stac: bool
 ) -> Callable:
-    band_mapping: Optional[dict] = None
-
-    if collection_name == "COPERNICUS_30":
-        band_mapping = BASE_DEM_MAPPING
-    elif collection_name == "AGERA5":
-        band_mapping = BASE_WEATHER_MAPPING
-    elif is_stac and (AGERA5_TERRASCOPE_STAC in collection_name):
-        band_mapping = AGERA5_STAC_MAPPING
+    band_mapping = _resolve_mapping(collection_name, is_stac)
 
     def generic_default_fetcher(
         connection: openeo.Connection,
@@ -107,19 +116,17 @@ def _get_generic_processor(
     """Builds the preprocessing function from the collection name as it stored
     in the target backend.
     """
-    band_mapping: Optional[dict] = None
-    if collection_name == "COPERNICUS_30":
-        band_mapping = BASE_DEM_MAPPING
-    elif collection_name == "AGERA5":
-        band_mapping = BASE_WEATHER_MAPPING
-    elif is_stac and (AGERA5_TERRASCOPE_STAC in collection_name):
-        band_mapping = AGERA5_STAC_MAPPING
+    band_mapping = _resolve_mapping(collection_name, is_stac)
 
     def generic_default_processor(cube: openeo.DataCube, **params):
         """Default collection preprocessing method for generic datasets.
         This method renames bands and removes the time dimension in case the
         requested dataset is DEM
         """
+        # Reduce the time dimension first, so that a single layer is resampled
+        if collection_name == "COPERNICUS_30":
+            cube = cube.min_time()
+
         if params.get("target_resolution", None) is not None:
             cube = resample_reproject(
                 cube,
@@ -128,9 +135,6 @@ def _get_generic_processor(
                 method=params.get("resampling_method", "near"),
             )
 
-        if collection_name == "COPERNICUS_30":
-            cube = cube.min_time()
-
         if band_mapping is not None:
             cube = rename_bands(cube, band_mapping)
 
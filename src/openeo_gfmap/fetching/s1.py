@@ -179,15 +179,31 @@ SENTINEL1_GRD_BACKEND_MAP = {
 }
 
 
+# Fetching and preprocessing functions, built once for every supported backend
+# and fetch type
+_SENTINEL1_GRD_EXTRACTOR_FUNCTIONS = {
+    (backend, fetch_type): (
+        backend_functions["default"](fetch_type=fetch_type),
+        backend_functions["preprocessor"](fetch_type=fetch_type),
+    )
+    for backend, backend_functions in SENTINEL1_GRD_BACKEND_MAP.items()
+    for fetch_type in FetchType
+}
+
+
 def build_sentinel1_grd_extractor(
     backend_context: BackendContext, bands: list, fetch_type: FetchType, **params
 ) -> CollectionFetcher:
     """Creates a S1 GRD collection extractor for the given backend."""
-    backend_functions = SENTINEL1_GRD_BACKEND_MAP.get(backend_context.backend)
-
-    fetcher, preprocessor = (
-        backend_functions["default"](fetch_type=fetch_type),
-        backend_functions["preprocessor"](fetch_type=fetch_type),
+    extractor_functions = _SENTINEL1_GRD_EXTRACTOR_FUNCTIONS.get(
+        (backend_context.backend, fetch_type)
     )
+    if extractor_functions is None:
+        raise ValueError(
+            f"Backend {backend_context.backend} is not supported for the S1 GRD "
+            "collection."
+        )
+
+    fetcher, preprocessor = extractor_functions
 
     return CollectionFetcher(backend_context, bands, fetcher, preprocessor, **params)
@@ -131,12 +131,13 @@ def _get_s2_l2a_element84_fetcher(
         """Collection fetcher on the element84 collection."""
         bands = convert_band_names(bands, ELEMENT84_SENTINEL2_L2A_MAPPING)
 
-        if isinstance(spatial_extent, BoundingBoxExtent):
-            spatial_extent = dict(spatial_extent)
-        elif isinstance(spatial_extent, GeoJSON):
+        # Checked before the conversion to dict, which loses the GeoJSON type
+        is_geojson = isinstance(spatial_extent, GeoJSON)
+        if is_geojson:
             assert (
                 spatial_extent.get("crs", None) is not None
             ), "CRS not defined within GeoJSON collection."
+        if is_geojson or isinstance(spatial_extent, BoundingBoxExtent):
             spatial_extent = dict(spatial_extent)
 
         cube = connection.load_stac(
@@ -149,7 +150,7 @@ def _get_s2_l2a_element84_fetcher(
         cube.metadata = FakeMetadata(band_names=bands)
 
         # Apply if the collection is a GeoJSON Feature collection
-        if isinstance(spatial_extent, GeoJSON):
+        if is_geojson:
             cube = cube.filter_spatial(spatial_extent)
 
         return cube
@@ -223,15 +224,31 @@ SENTINEL2_L2A_BACKEND_MAP = {
 }
 
 
+# Fetching and preprocessing functions, built once for every supported backend
+# and fetch type
+_SENTINEL2_L2A_EXTRACTOR_FUNCTIONS = {
+    (backend, fetch_type): (
+        backend_functions["fetch"](fetch_type=fetch_type),
+        backend_functions["preprocessor"](fetch_type=fetch_type),
+    )
+    for backend, backend_functions in SENTINEL2_L2A_BACKEND_MAP.items()
+    for fetch_type in FetchType
+}
+
+
 def build_sentinel2_l2a_extractor(
     backend_context: BackendContext, bands: list, fetch_type: FetchType, **params
 ) -> CollectionFetcher:
     """Creates a S2 L2A extractor adapted to the given backend."""
-    backend_functions = SENTINEL2_L2A_BACKEND_MAP.get(backend_context.backend)
-
-    fetcher, preprocessor = (
-        backend_functions["fetch"](fetch_type=fetch_type),
-        backend_functions["preprocessor"](fetch_type=fetch_type),
+    extractor_functions = _SENTINEL2_L2A_EXTRACTOR_FUNCTIONS.get(
+        (backend_context.backend, fetch_type)
     )
+    if extractor_functions is None:
+        raise ValueError(
+            f"Backend {backend_context.backend} is not supported for the S2 L2A "
+            "collection."
+        )
+
+    fetcher, preprocessor = extractor_functions
 
     return CollectionFetcher(backend_context, bands, fetcher, preprocessor, **params)
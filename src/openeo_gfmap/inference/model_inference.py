@@ -2,13 +2,18 @@
 of inference models on an UDF.
 """
 
+import contextlib
 import functools
+import hashlib
 import inspect
 import logging
+import os
 import re
 import shutil
 import sys
+import tempfile
 import urllib.request
+import zipfile
 from abc import ABC, abstractmethod
 from pathlib import Path
 
@@ -61,12 +66,15 @@ class ModelInference(ABC):
         # Create the directory if it doesn't exist
         dependencies_dir.mkdir(exist_ok=True, parents=True)
 
-        # Download and extract the model file
+        # Download and extract the model file. The archive is streamed in
+        # memory, or in a temporary file if too large, instead of being
+        # written in the dependencies folder and read again to unpack it.
         modelfile_url = f"{base_url}/{dependency_name}"
-        modelfile, _ = urllib.request.urlretrieve(
-            modelfile_url, filename=dependencies_dir / Path(modelfile_url).name
-        )
-        shutil.unpack_archive(modelfile, extract_dir=dependencies_dir)
+        with tempfile.SpooledTemporaryFile(max_size=2**28) as archive_file:
+            with urllib.request.urlopen(modelfile_url) as response:
+                shutil.copyfileobj(response, archive_file)
+            with zipfile.ZipFile(archive_file) as archive:
+                archive.extractall(dependencies_dir)
 
         # Add the model directory to system path if it's not already there
         abs_path = str(
@@ -75,18 +83,122 @@ class ModelInference(ABC):
 
         return abs_path
 
+    @staticmethod
+    @contextlib.contextmanager
+    def _cache_lock(lock_path: Path):
+        """Exclusive file lock of the model cache, preventing concurrent workers
+        from writing the same cached file at the same time.
+        """
+        with open(lock_path, "w", encoding="utf-8") as lock:
+            try:
+                import fcntl
+
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            except ImportError:  # File locking is not available on Windows
+                pass
+            yield
+
+    @classmethod
+    def _cached_model_path(cls, model_url: str) -> Path:
+        """Returns the path of the model downloaded from the given URL in a cache
+        directory shared by the workers running on the same machine. The model
+        is only downloaded if it is not already present in the cache. A file
+        lock prevents concurrent workers from downloading the same model at the
+        same time, and the model is moved atomically in the cache once
+        completely written.
+        The cached model is identified by its URL and by the ETag or
+        Last-Modified header returned by the server, so that a model published
+        again at the same URL is downloaded again. If the server doesn't
+        return any of these headers, the cached model is identified by its
+        URL only.
+        """
+        cache_dir = Path(tempfile.gettempdir()) / "onnx_cache"
+        cache_dir.mkdir(exist_ok=True, parents=True)
+
+        try:
+            with requests.head(model_url, allow_redirects=True, timeout=30) as response:
+                response.raise_for_status()
+                validator = response.headers.get("ETag") or response.headers.get(
+                    "Last-Modified", ""
+                )
+        except requests.RequestException:
+            validator = ""
+
+        url_hash = hashlib.sha256(f"{model_url}{validator}".encode("utf-8")).hexdigest()
+        model_path = cache_dir / f"{url_hash}.onnx"
+
+        with cls._cache_lock(cache_dir / f"{url_hash}.lock"):
+            if not model_path.exists():
+                # Streams the model to disk instead of buffering it in memory,
+                # with two minutes timeout to download the model
+                fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as tmp_file, requests.get(
+                        model_url, stream=True, timeout=120
+                    ) as response:
+                        response.raise_for_status()
+                        for chunk in response.iter_content(chunk_size=1 << 20):
+                            tmp_file.write(chunk)
+                    os.replace(tmp_path, model_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+
+        return model_path
+
+    @classmethod
+    def _quantized_model_path(cls, model_path: Path) -> Path:
+        """Returns the path of the dynamically int8 quantized variant of the
+        given model, stored next to it in the cache directory. The model is
+        only quantized if the quantized variant is not already present in the
+        cache, under the same file lock as the download, and is moved
+        atomically in the cache once completely written.
+        Requires the `onnx` package, installed with the `quantization` extra.
+        """
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as exc:
+            raise ImportError(
+                "Running a quantized model requires the onnx package, which can "
+                "be installed with: pip install openeo_gfmap[quantization]"
+            ) from exc
+
+        quantized_path = model_path.with_suffix(".int8.onnx")
+        with cls._cache_lock(quantized_path.with_suffix(".lock")):
+            if not quantized_path.exists():
+                fd, tmp_path = tempfile.mkstemp(dir=model_path.parent, suffix=".part")
+                os.close(fd)
+                try:
+                    quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+                    os.replace(tmp_path, quantized_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+
+        return quantized_path
+
     @classmethod
     @functools.lru_cache(maxsize=6)
-    def load_ort_session(cls, model_url: str):
+    def load_ort_session(cls, model_url: str, quantized: bool = False):
         """Loads an onnx session from a publicly available URL. The URL must be a direct
         download link to the ONNX session file.
-        The `lru_cache` decorator avoids loading multiple time the model within the same worker.
+        The `lru_cache` decorator avoids loading multiple time the model within the same worker,
+        while the model file is cached on disk for the other workers of the same machine.
+        If `quantized` is set, the weights of the model are dynamically quantized to int8
+        before loading the session, which speeds up the matrix multiplications on CPU at the
+        cost of some precision.
         """
-        # Two minutes timeout to download the model
-        response = requests.get(model_url, timeout=120)
-        model = response.content
+        model_path = cls._cached_model_path(model_url)
+        if quantized:
+            model_path = cls._quantized_model_path(model_path)
+
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        session_options.enable_mem_pattern = True
 
-        return ort.InferenceSession(model)
+        return ort.InferenceSession(str(model_path), sess_options=session_options)
 
     def apply_ml(
         self, tensor: np.ndarray, session: ort.InferenceSession, input_name: str
@@ -169,6 +281,10 @@ class ONNXModelInference(ModelInference):
     - `input_name`: Name of the input tensor in the ONNX model.
     - `output_labels`: Labels of the output data.
 
+    Optionally, `quantized` can be set to run a dynamically int8 quantized
+    variant of the model, which requires the `onnx` package, installed with
+    the `quantization` extra.
+
     """
 
     def dependencies(self) -> list:
@@ -182,7 +298,10 @@ class ONNXModelInference(ModelInference):
             raise ValueError("The model_url must be defined in the parameters.")
 
         # Load the model and the input_name parameters
-        session = ModelInference.load_ort_session(self._parameters.get("model_url"))
+        session = ModelInference.load_ort_session(
+            self._parameters.get("model_url"),
+            quantized=self._parameters.get("quantized", False),
+        )
 
         input_name = self._parameters.get("input_name")
         if input_name is None:
@@ -193,11 +312,33 @@ class ONNXModelInference(ModelInference):
             )
 
         # Run the model inference on the input data
-        input_data = inarr.values.astype(np.float32)
-        n_bands, height, width = input_data.shape
+        n_bands, height, width = inarr.shape
+
+        # Flatten the x and y coordiantes into one, so that the whole tile is
+        # predicted in a single batched call of the session. The tensor is
+        # converted to a C-contiguous float32 array in a single copy, which the
+        # session then uses without any internal copy.
+        input_data = np.ascontiguousarray(
+            inarr.values.reshape(n_bands, -1).T, dtype=np.float32
+        )
 
-        # Flatten the x and y coordiantes into one
-        input_data = input_data.reshape(n_bands, -1).T
+        # Models exported with an additional leading batch dimension expect a
+        # (1, instances, bands) tensor
+        input_rank = next(
+            (
+                len(model_input.shape)
+                for model_input in session.get_inputs()
+                if model_input.name == input_name
+            ),
+            None,
+        )
+        if input_rank is None:
+            raise ValueError(
+                f"The input {input_name} is not an input of the model, which "
+                f"expects: {[model_input.name for model_input in session.get_inputs()]}."
+            )
+        if input_rank == 3:
+            input_data = input_data[np.newaxis]
 
         # Make the prediction
         output = self.apply_ml(input_data, session, input_name)
@@ -241,13 +382,18 @@ def _get_imports() -> str:
 
     imports = []
     static_globals = []
+    # Compiled here rather than as a module constant, as UPPER_CASE module
+    # globals are themselves copied in the UDF
+    global_assignment = re.compile(r"^[A-Z_0-9]+\s*=")
 
     for line in lines:
-        if line.strip().startswith(
+        # Only the module level imports, as function level imports are kept in
+        # their function body
+        if line.startswith(
             ("import ", "from ", "sys.path.insert(", "sys.path.append(")
         ):
             imports.append(line)
-        elif re.match("^[A-Z_0-9]+\s*=.*$", line):
+        elif global_assignment.match(line):
             static_globals.append(line)
 
     return "\n".join(imports) + "\n\n" + "\n".join(static_globals)
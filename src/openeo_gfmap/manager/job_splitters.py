@@ -198,6 +198,37 @@ def split_job_hex(
     return split_datasets
 
 
+def split_job_hilbert(
+    polygons: gpd.GeoDataFrame, max_points: int = 500
+) -> List[gpd.GeoDataFrame]:
+    """Split a job into multiple jobs from the position of the polygons/points. The geometries
+    are ordered along a Hilbert curve, which keeps nearby geometries next to each other, and the
+    consecutive geometries are grouped in jobs of at most `max_points` geometries. Contrary to the
+    grid based splitters, the jobs are balanced in size and no grid needs to be downloaded.
+
+    Parameters
+    ----------
+    polygons: gpd.GeoDataFrame
+        Dataset containing the polygons to split the job by with a `geometry` column.
+    max_points: int
+        The maximum number of points to be included in each job.
+    Returns:
+    --------
+    split_polygons: list
+        List of jobs, split by the GeoDataFrame.
+    """
+    if "geometry" not in polygons.columns:
+        raise ValueError("The GeoDataFrame must contain a 'geometry' column.")
+
+    if polygons.crs is None:
+        raise ValueError("The GeoDataFrame must contain a CRS")
+
+    # Distance along the curve of the midpoint of each geometry
+    hilbert_order = polygons.hilbert_distance().argsort(kind="stable")
+
+    return list(_resplit_group(polygons.iloc[hilbert_order], max_points))
+
+
 def split_job_s2sphere(
     gdf: gpd.GeoDataFrame, max_points=500, start_level=8
 ) -> List[gpd.GeoDataFrame]:
@@ -15,15 +15,21 @@ from openeo_gfmap.utils.tile_processing import (
 )
 
 _log = logging.getLogger(__name__)
-_log.setLevel(logging.INFO)
+if _log.level == logging.NOTSET:
+    _log.setLevel(logging.INFO)
 
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
+# The handler is only attached once, as the module can be imported again
+# after a reload, which would otherwise log every message twice
+if not _log.handlers:
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.INFO)
 
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-ch.setFormatter(formatter)
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    ch.setFormatter(formatter)
 
-_log.addHandler(ch)
+    _log.addHandler(ch)
 
 
 __all__ = [
@@ -0,0 +1,131 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+import xarray as xr
+
+EXAMPLE_PATH = (
+    Path(__file__).parents[3]
+    / "examples"
+    / "feature_extractors"
+    / "quantile_feature_extractor.py"
+)
+
+BANDS = [
+    "S2-L2A-B03",
+    "S2-L2A-B04",
+    "S2-L2A-B05",
+    "S2-L2A-B06",
+    "S2-L2A-B08",
+    "S2-L2A-B11",
+    "S2-L2A-B12",
+]
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def extractor_class(request, monkeypatch):
+    """Loads the quantile feature extractor of the examples, computing the
+    quantiles with the numba kernel or with the numpy fallback."""
+    spec = importlib.util.spec_from_file_location("quantile_example", EXAMPLE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    extractor_class = module.QuantileIndicesExtractor
+    if request.param == "numba":
+        pytest.importorskip("numba")
+        assert extractor_class._get_quantiles_kernel() is not None
+    else:
+        monkeypatch.setattr(extractor_class, "_quantiles_kernel", False)
+    return extractor_class
+
+
+def _reference_quantiles(inarr: xr.DataArray) -> xr.DataArray:
+    """Computes the features in float64 with `xarray.DataArray.quantile`."""
+    inarr = inarr.astype(np.float64)
+    b03, b04, b05, b06, b08, b11, b12 = (inarr.sel(bands=band) for band in BANDS)
+    indices = [
+        (b08 - b04) / (b08 + b04),
+        (b03 - b08) / (b03 + b08),
+        (b08 - b11) / (b08 + b11),
+        (b05 - b08) / (b05 + b08),
+        (b06 - b08) / (b06 + b08),
+        b11,
+        b12,
+    ]
+    features = []
+    for data in indices:
+        quantiles = data.quantile([0.1, 0.5, 0.9], dim="t")
+        features.extend(
+            [
+                quantiles.sel(quantile=0.1, drop=True),
+                quantiles.sel(quantile=0.5, drop=True),
+                quantiles.sel(quantile=0.9, drop=True),
+                quantiles.sel(quantile=0.9, drop=True)
+                - quantiles.sel(quantile=0.1, drop=True),
+            ]
+        )
+    return xr.concat(features, dim="bands").transpose("bands", "y", "x")
+
+
+def _execute(extractor_class, inarr: xr.DataArray) -> xr.DataArray:
+    extractor = extractor_class()
+    extractor._epsg = 32631
+    extractor._parameters = {}
+    return extractor.execute(inarr)
+
+
+def test_quantile_feature_extractor(extractor_class):
+    rng = np.random.default_rng(42)
+    data = rng.integers(1, 10000, size=(len(BANDS), 8, 5, 6)).astype(np.float32)
+    # Missing observations, and a pixel without any valid observation
+    data[rng.random(data.shape) < 0.2] = np.nan
+    data[:, :, 0, 0] = np.nan
+    inarr = xr.DataArray(
+        data,
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": BANDS, "y": np.arange(5), "x": np.arange(6)},
+    )
+
+    result = _execute(extractor_class, inarr)
+    expected = _reference_quantiles(inarr)
+
+    assert result.dims == ("bands", "y", "x")
+    assert result.dtype == np.float32
+    assert list(result.bands.values) == extractor_class().output_labels()
+    assert np.isnan(result.values[:, 0, 0]).all()
+
+    # The indices are quantized to int16 with a 1e-4 resolution, and their
+    # IQR is the difference of two quantized quantiles
+    n_index_features = 5 * 4
+    np.testing.assert_allclose(
+        result.values[:n_index_features],
+        expected.values[:n_index_features],
+        atol=2e-4,
+        rtol=0,
+    )
+    np.testing.assert_allclose(
+        result.values[n_index_features:], expected.values[n_index_features:], rtol=1e-5
+    )
+
+
+def test_quantile_feature_extractor_int16_round_trip(extractor_class):
+    # Constant time series of normalized differences of 0.5, 1 and -1, which
+    # are represented exactly by the int16 quantization
+    data = np.ones((len(BANDS), 4, 1, 1), dtype=np.float32)
+    data[BANDS.index("S2-L2A-B04")] = 1
+    data[BANDS.index("S2-L2A-B08")] = 3
+    data[BANDS.index("S2-L2A-B03")] = 0
+    data[BANDS.index("S2-L2A-B11")] = 0
+    inarr = xr.DataArray(
+        data,
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": BANDS, "y": [0], "x": [0]},
+    )
+
+    result = _execute(extractor_class, inarr)
+
+    np.testing.assert_allclose(result.sel(bands="NDVI:50").values, 0.5, atol=1e-6)
+    np.testing.assert_allclose(result.sel(bands="NDWI:50").values, -1.0, atol=1e-6)
+    np.testing.assert_allclose(result.sel(bands="NDMI:50").values, 1.0, atol=1e-6)
+    np.testing.assert_allclose(result.sel(bands="NDVI:IQR").values, 0.0, atol=1e-6)
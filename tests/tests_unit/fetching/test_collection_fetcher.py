@@ -68,6 +68,8 @@ def test_collection_fetcher(
         collection_preprocessing=mock_collection_preprocessing,  # Use the mock preprocessing function
     )
 
+    assert fetcher.backend_context is mock_backend_context
+
     # Call the method you're testing
     result = fetcher.get_cube(
         mock_connection, mock_spatial_extent, mock_temporal_context
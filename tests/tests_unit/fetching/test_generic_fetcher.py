@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+import openeo
+import pytest
+from openeo.metadata import (
+    Band,
+    BandDimension,
+    CollectionMetadata,
+    TemporalDimension,
+)
+
+from openeo_gfmap.fetching import FetchType
+from openeo_gfmap.fetching.generic import (
+    AGERA5_STAC_MAPPING,
+    AGERA5_TERRASCOPE_STAC,
+    BASE_DEM_MAPPING,
+    BASE_WEATHER_MAPPING,
+    _get_generic_processor,
+    _resolve_mapping,
+)
+
+
+@pytest.mark.parametrize(
+    "collection_name, is_stac, expected",
+    [
+        ("COPERNICUS_30", False, BASE_DEM_MAPPING),
+        ("AGERA5", False, BASE_WEATHER_MAPPING),
+        (AGERA5_TERRASCOPE_STAC, True, AGERA5_STAC_MAPPING),
+        (AGERA5_TERRASCOPE_STAC, False, None),
+        ("SENTINEL2_L2A", False, None),
+    ],
+)
+def test_resolve_mapping(collection_name, is_stac, expected):
+    assert _resolve_mapping(collection_name, is_stac) == expected
+
+
+def test_generic_processor_dem_graph():
+    """The DEM is reduced over time before being resampled, and its bands are
+    renamed in a single process."""
+    cube = openeo.DataCube.load_collection(
+        "COPERNICUS_30",
+        connection=MagicMock(spec=openeo.Connection),
+        fetch_metadata=False,
+        bands=["DEM"],
+    )
+    cube.metadata = CollectionMetadata(
+        metadata={},
+        dimensions=[
+            TemporalDimension(name="t", extent=[]),
+            BandDimension(name="bands", bands=[Band(name="DEM")]),
+        ],
+    )
+
+    processor = _get_generic_processor("COPERNICUS_30", FetchType.TILE, False)
+    cube = processor(cube, target_resolution=20.0, target_crs=32631)
+
+    process_ids = [node["process_id"] for node in cube.flat_graph().values()]
+    assert process_ids == [
+        "load_collection",
+        "reduce_dimension",
+        "resample_spatial",
+        "rename_labels",
+    ]
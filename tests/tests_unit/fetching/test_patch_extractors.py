@@ -1,10 +1,12 @@
+import sys
 from unittest.mock import MagicMock
 
 import numpy as np
 import pytest
 import xarray as xr
 
-from openeo_gfmap.features import PatchFeatureExtractor
+from openeo_gfmap.features import PatchFeatureExtractor, apply_feature_extractor_local
+from openeo_gfmap.features.feature_extractor import _generate_udf_code
 
 LAT_HARMONIZED_NAME = "GEO-LAT"
 LON_HARMONIZED_NAME = "GEO-LON"
@@ -61,6 +63,18 @@ def test_get_latlons_reproject(mock_feature_extractor, mock_data_array):
     assert result[1].shape == yy.shape
 
 
+def test_get_latlons_array(mock_feature_extractor, mock_data_array):
+    mock_feature_extractor._epsg = 3857
+
+    result = mock_feature_extractor.get_latlons_array(mock_data_array)
+
+    assert isinstance(result, np.ndarray)
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(
+        result, mock_feature_extractor.get_latlons(mock_data_array).values
+    )
+
+
 # test rescaling
 def test_rescale_s1_backscatter_valid(mock_feature_extractor, mock_data_array):
     s1_bands = ["S1-SIGMA0-VV", "S1-SIGMA0-VH"]
@@ -101,3 +115,333 @@ def test_execute():
     # Check that the mock methods were called
     extractor._common_preparations.assert_called()
     extractor._rescale_s1_backscatter.assert_called()
+
+
+class MeanPatchFeatureExtractor(PatchFeatureExtractor):
+    def output_labels(self):
+        return ["mean"]
+
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        return inarr.mean(dim=["bands", "t"]).expand_dims(bands=["mean"])
+
+
+def test_apply_feature_extractor_local_chunked():
+    pytest.importorskip("dask")
+    data = xr.DataArray(
+        np.random.rand(2, 3, 4, 4).astype(np.float32),
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    )
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    expected = apply_feature_extractor_local(
+        MeanPatchFeatureExtractor, data, parameters
+    )
+    result = apply_feature_extractor_local(
+        MeanPatchFeatureExtractor,
+        data.chunk({"y": 2, "x": 2}),
+        parameters,
+        chunked=True,
+    )
+
+    assert result.chunks is not None
+    assert result.dtype == result.compute().dtype
+    xr.testing.assert_allclose(result.compute(), expected)
+
+    # Dask backed cubes are processed as a whole by default
+    result = apply_feature_extractor_local(
+        MeanPatchFeatureExtractor, data.chunk({"y": 2, "x": 2}), parameters
+    )
+    xr.testing.assert_allclose(result, expected)
+
+
+class SmoothPatchFeatureExtractor(PatchFeatureExtractor):
+    def output_labels(self):
+        return ["smooth"]
+
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        # Float64 output using the spatial context of the pixels
+        mean = inarr.astype(np.float64).mean(dim=["bands", "t"])
+        smooth = mean.rolling(y=3, x=3, center=True, min_periods=1).mean()
+        return smooth.expand_dims(bands=["smooth"])
+
+
+def test_apply_feature_extractor_local_chunked_overlap():
+    pytest.importorskip("dask")
+    data = xr.DataArray(
+        np.random.rand(2, 3, 6, 6).astype(np.float32),
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(6), "x": np.arange(6)},
+    )
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    expected = apply_feature_extractor_local(
+        SmoothPatchFeatureExtractor, data, parameters
+    )
+    result = apply_feature_extractor_local(
+        SmoothPatchFeatureExtractor,
+        data.chunk({"y": 3, "x": 2}),
+        parameters,
+        chunked=True,
+        overlap=1,
+    )
+
+    assert result.dtype == np.float64
+    xr.testing.assert_allclose(result.compute(), expected)
+
+
+class TimeLastPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    PREFERRED_LAYOUT = ("bands", "y", "x", "t")
+
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        assert inarr.dims == self.PREFERRED_LAYOUT
+        assert inarr.data.flags["C_CONTIGUOUS"]
+        return super().execute(inarr)
+
+
+def test_execute_preferred_layout():
+    data = xr.DataArray(
+        np.random.rand(3, 2, 4, 4).astype(np.float32),
+        dims=["t", "bands", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    )
+
+    result = apply_feature_extractor_local(
+        TimeLastPatchFeatureExtractor,
+        data,
+        {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False},
+    )
+
+    assert result.dims == ("bands", "y", "x")
+    np.testing.assert_allclose(
+        result.values[0], data.mean(dim=["t", "bands"]), rtol=1e-6
+    )
+
+
+class ViewPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        self.inarr = inarr
+        return super().execute(inarr)
+
+
+class ContiguousPatchFeatureExtractor(ViewPatchFeatureExtractor):
+    CONTIGUOUS = True
+
+
+def test_execute_default_layout_view():
+    from openeo.udf import XarrayDataCube
+
+    data = xr.DataArray(
+        np.random.rand(3, 2, 4, 4).astype(np.float32),
+        dims=["t", "bands", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    )
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    # The default layout is a transposed view of the input, without any copy
+    extractor = ViewPatchFeatureExtractor()
+    extractor._execute(XarrayDataCube(data), parameters)
+    assert extractor.inarr.dims == ("bands", "t", "y", "x")
+    assert np.shares_memory(extractor.inarr.data, data.data)
+
+    extractor = ContiguousPatchFeatureExtractor()
+    extractor._execute(XarrayDataCube(data), parameters)
+    assert not np.shares_memory(extractor.inarr.data, data.data)
+    assert extractor.inarr.data.flags["C_CONTIGUOUS"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="requires ast.unparse")
+def test_generate_udf_code_stripped():
+    udf_code = _generate_udf_code(MeanPatchFeatureExtractor, ("numpy",))
+
+    # The dependencies header is kept, but not the docstrings
+    assert udf_code.startswith('# /// script\n# dependencies = [\n#  "numpy",')
+    assert '"""' not in udf_code
+
+    namespace = {}
+    exec(compile(udf_code, "udf", "exec"), namespace)
+    assert namespace["MeanPatchFeatureExtractor"]().output_labels() == ["mean"]
+
+
+class RawPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    RAW_NDARRAY = True
+
+    def execute(self, inarr: np.ndarray) -> np.ndarray:
+        assert isinstance(inarr, np.ndarray)
+        return inarr.mean(axis=(0, 1))[np.newaxis]
+
+
+def test_execute_raw_ndarray():
+    data = xr.DataArray(
+        np.random.rand(2, 3, 4, 4).astype(np.float32),
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    )
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    expected = apply_feature_extractor_local(
+        MeanPatchFeatureExtractor, data, parameters
+    )
+    result = apply_feature_extractor_local(RawPatchFeatureExtractor, data, parameters)
+
+    xr.testing.assert_allclose(result, expected)
+
+
+class EagerPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        assert isinstance(inarr.data, np.ndarray)
+        return super().execute(inarr)
+
+
+def test_execute_eager():
+    pytest.importorskip("dask")
+    from openeo.udf import XarrayDataCube
+
+    data = xr.DataArray(
+        np.random.rand(2, 3, 4, 4).astype(np.float32),
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    ).chunk({"y": 2})
+
+    extractor = EagerPatchFeatureExtractor()
+    result = extractor._execute(
+        XarrayDataCube(data), {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+    )
+
+    assert result.get_array().dims == ("bands", "y", "x")
+
+
+def test_common_preparations_keeps_parameters(mock_feature_extractor, mock_data_array):
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    mock_feature_extractor._common_preparations(mock_data_array, parameters)
+
+    assert mock_feature_extractor.epsg == 32631
+    assert mock_feature_extractor._parameters == {"rescale_s1": False}
+    assert parameters == {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+
+@pytest.mark.parametrize("dtype", [np.uint16, np.float32])
+def test_rescale_s1_backscatter_invalid(mock_feature_extractor, dtype):
+    data = np.array([[[0, 2], [3, 4]]], dtype=dtype)
+    mock_data_array = xr.DataArray(
+        data, dims=["bands", "y", "x"], coords={"bands": ["S1-SIGMA0-VV"]}
+    )
+
+    with pytest.raises(ValueError):
+        mock_feature_extractor._rescale_s1_backscatter(mock_data_array)
+
+
+def test_extract_dependencies(tmp_path, monkeypatch):
+    import zipfile
+
+    archive_dir = tmp_path / "archives"
+    archive_dir.mkdir()
+    with zipfile.ZipFile(archive_dir / "deps.zip", "w") as archive:
+        archive.writestr("deps/module.py", "VALUE = 1\n")
+
+    monkeypatch.chdir(tmp_path)
+    abs_path = DummyPatchFeatureExtractor.extract_dependencies(
+        archive_dir.as_uri(), "deps.zip"
+    )
+
+    assert abs_path == str(tmp_path / "dependencies" / "deps")
+    assert (tmp_path / "dependencies" / "deps" / "module.py").read_text() == (
+        "VALUE = 1\n"
+    )
+
+
+def test_rescale_s1_backscatter_in_place(mock_feature_extractor):
+    data = np.array([[[1, 10], [100, 1000]], [[5, 6], [7, 8]]], dtype=np.float32)
+    mock_data_array = xr.DataArray(
+        data, dims=["bands", "y", "x"], coords={"bands": ["S1-SIGMA0-VV", "B02"]}
+    )
+
+    result = mock_feature_extractor._rescale_s1_backscatter(mock_data_array)
+
+    assert result.data is data
+    np.testing.assert_allclose(data[0], [[-83.0, -63.0], [-43.0, -23.0]], rtol=1e-6)
+    np.testing.assert_array_equal(data[1], [[5, 6], [7, 8]])
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_rescale_s1_backscatter_non_finite(mock_feature_extractor, chunked):
+    """Zeros hidden from the validation by NaN values are rescaled to NaN,
+    instead of infinite values."""
+    data = np.array([[[np.nan, 0], [1, 10]]], dtype=np.float32)
+    mock_data_array = xr.DataArray(
+        data, dims=["bands", "y", "x"], coords={"bands": ["S1-SIGMA0-VV"]}
+    )
+    if chunked:
+        pytest.importorskip("dask")
+        mock_data_array = mock_data_array.chunk({"y": 1})
+
+    result = mock_feature_extractor._rescale_s1_backscatter(mock_data_array)
+
+    np.testing.assert_allclose(
+        result.values[0], [[np.nan, np.nan], [-83.0, -63.0]], rtol=1e-6
+    )
+
+
+def test_get_instance_cached():
+    instance = MeanPatchFeatureExtractor._get_instance()
+
+    assert isinstance(instance, MeanPatchFeatureExtractor)
+    assert MeanPatchFeatureExtractor._get_instance() is instance
+    # Subclasses get their own instance
+    assert isinstance(
+        TimeLastPatchFeatureExtractor._get_instance(), TimeLastPatchFeatureExtractor
+    )
+
+
+class StatefulPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    def reset_for_call(self):
+        self.calls = 0
+
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        self.calls += 1
+        return super().execute(inarr)
+
+
+class UnsharedPatchFeatureExtractor(MeanPatchFeatureExtractor):
+    REUSE_INSTANCE = False
+
+
+def test_get_instance_reset():
+    instance = StatefulPatchFeatureExtractor._get_instance()
+    instance.calls = 3
+
+    assert StatefulPatchFeatureExtractor._get_instance() is instance
+    assert instance.calls == 0
+
+    # Opting out of the shared instance
+    assert (
+        UnsharedPatchFeatureExtractor._get_instance()
+        is not UnsharedPatchFeatureExtractor._get_instance()
+    )
+
+
+class SingleDatePatchFeatureExtractor(MeanPatchFeatureExtractor):
+    EXPECTS_T = False
+
+    def execute(self, inarr: xr.DataArray) -> xr.DataArray:
+        assert inarr.dims == ("bands", "y", "x")
+        return inarr.mean(dim="bands").expand_dims(bands=["mean"])
+
+
+def test_execute_squeeze_single_timestep():
+    data = xr.DataArray(
+        np.random.rand(2, 1, 4, 4).astype(np.float32),
+        dims=["bands", "t", "y", "x"],
+        coords={"bands": ["B02", "B03"], "y": np.arange(4), "x": np.arange(4)},
+    )
+    parameters = {EPSG_HARMONIZED_NAME: 32631, "rescale_s1": False}
+
+    expected = apply_feature_extractor_local(
+        MeanPatchFeatureExtractor, data, parameters
+    )
+    result = apply_feature_extractor_local(
+        SingleDatePatchFeatureExtractor, data, parameters
+    )
+
+    xr.testing.assert_allclose(result, expected)
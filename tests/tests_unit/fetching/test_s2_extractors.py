@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
 
+import geojson
 import openeo
 import pytest
 
@@ -14,6 +15,7 @@ from openeo_gfmap.fetching.s2 import (
     BASE_SENTINEL2_L2A_MAPPING,
     _get_s2_l2a_default_fetcher,
     _get_s2_l2a_default_processor,
+    _get_s2_l2a_element84_fetcher,
 )
 from tests.utils.helpers import create_test_datacube
 
@@ -219,3 +221,20 @@ def test_build_sentinel2_l2a_extractor(mock_backend_context):
 
     assert isinstance(extractor, CollectionFetcher)
     assert extractor.bands == bands
+
+
+def test_element84_fetcher_filters_geojson(mock_connection, mock_temporal_extent):
+    """Test that the element84 fetcher filters the cube on GeoJSON extents."""
+    spatial_extent = geojson.FeatureCollection(
+        features=[], crs={"type": "name", "properties": {"name": "EPSG:4326"}}
+    )
+    fetch_fn = _get_s2_l2a_element84_fetcher(COLLECTION_NAME, FetchType.POLYGON)
+
+    result = fetch_fn(mock_connection, spatial_extent, mock_temporal_extent, BANDS)
+
+    load_stac_extent = mock_connection.load_stac.call_args.args[1]
+    assert type(load_stac_extent) is dict
+    mock_connection.load_stac.return_value.filter_spatial.assert_called_once_with(
+        load_stac_extent
+    )
+    assert result is mock_connection.load_stac.return_value.filter_spatial.return_value
@@ -0,0 +1,175 @@
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from openeo_gfmap.inference.model_inference import ModelInference, ONNXModelInference
+
+MODEL_URL = "https://artifactory.vgt.vito.be/test/model.onnx"
+
+
+@pytest.fixture
+def mock_head():
+    """Mocks the request of the headers of the model, returning its ETag."""
+    with patch("openeo_gfmap.inference.model_inference.requests.head") as mock_head:
+        mock_head.return_value.__enter__.return_value.headers = {"ETag": '"v1"'}
+        yield mock_head
+
+
+@pytest.fixture
+def tmp_cache(tmp_path, monkeypatch, mock_head):
+    """Redirects the temporary directory used for the ONNX model cache."""
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    ModelInference.load_ort_session.cache_clear()
+    yield tmp_path
+    ModelInference.load_ort_session.cache_clear()
+
+
+@patch("openeo_gfmap.inference.model_inference.ort.InferenceSession")
+@patch("openeo_gfmap.inference.model_inference.requests.get")
+def test_load_ort_session_disk_cache(mock_get, mock_session, tmp_cache):
+    """The model is downloaded only once, even across workers that do not share
+    the in-memory cache."""
+    response = mock_get.return_value.__enter__.return_value
+    response.iter_content.return_value = [b"onnx-model-", b"bytes"]
+
+    ModelInference.load_ort_session(MODEL_URL)
+    # Simulates a new worker process with an empty in-memory cache
+    ModelInference.load_ort_session.cache_clear()
+    ModelInference.load_ort_session(MODEL_URL)
+
+    mock_get.assert_called_once()
+    assert mock_session.call_count == 2
+
+    model_paths = {call.args[0] for call in mock_session.call_args_list}
+    assert len(model_paths) == 1
+
+    model_path = model_paths.pop()
+    assert model_path.startswith(str(tmp_cache / "onnx_cache"))
+    with open(model_path, "rb") as model_file:
+        assert model_file.read() == b"onnx-model-bytes"
+
+
+@patch("openeo_gfmap.inference.model_inference.ort.InferenceSession")
+@patch("openeo_gfmap.inference.model_inference.requests.get")
+def test_load_ort_session_disk_cache_republished(
+    mock_get, mock_session, tmp_cache, mock_head
+):
+    """A model published again at the same URL, with a new ETag, is downloaded
+    again instead of being served from the cache."""
+    response = mock_get.return_value.__enter__.return_value
+    response.iter_content.return_value = [b"model-v1"]
+    ModelInference.load_ort_session(MODEL_URL)
+
+    mock_head.return_value.__enter__.return_value.headers = {"ETag": '"v2"'}
+    response.iter_content.return_value = [b"model-v2"]
+    ModelInference.load_ort_session.cache_clear()
+    ModelInference.load_ort_session(MODEL_URL)
+
+    assert mock_get.call_count == 2
+    with open(mock_session.call_args.args[0], "rb") as model_file:
+        assert model_file.read() == b"model-v2"
+
+
+def _batched_model_bytes(n_bands: int) -> bytes:
+    """Serializes a model summing the bands of a (1, instances, bands) tensor."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper
+
+    weights = helper.make_tensor(
+        "weights", TensorProto.FLOAT, [n_bands, 1], [1.0] * n_bands
+    )
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["features", "weights"], ["sum"])],
+        "batched_sum",
+        [
+            helper.make_tensor_value_info(
+                "features", TensorProto.FLOAT, [1, None, n_bands]
+            )
+        ],
+        [helper.make_tensor_value_info("sum", TensorProto.FLOAT, [1, None, 1])],
+        initializer=[weights],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+    return model.SerializeToString()
+
+
+@pytest.fixture
+def batched_inference(monkeypatch):
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(_batched_model_bytes(n_bands=3))
+    monkeypatch.setattr(
+        ModelInference,
+        "load_ort_session",
+        lambda model_url, quantized=False: session,
+    )
+
+    model_inference = ONNXModelInference()
+    model_inference._parameters = {
+        "model_url": MODEL_URL,
+        "input_name": "features",
+        "output_labels": ["sum"],
+    }
+    return model_inference
+
+
+def test_onnx_inference_batched_input(batched_inference):
+    """Models with a leading batch dimension receive a (1, instances, bands)
+    tensor."""
+    inarr = xr.DataArray(
+        np.arange(12, dtype=np.float32).reshape(3, 2, 2),
+        dims=["bands", "y", "x"],
+        coords={"bands": ["B02", "B03", "B04"], "y": [0, 1], "x": [0, 1]},
+    )
+
+    result = batched_inference.execute(inarr)
+
+    assert result.dims == ("bands", "y", "x")
+    np.testing.assert_allclose(result.values, inarr.sum(dim="bands").values[None])
+
+
+def test_onnx_inference_unknown_input_name(batched_inference):
+    batched_inference._parameters["input_name"] = "unknown"
+    inarr = xr.DataArray(
+        np.zeros((3, 2, 2), dtype=np.float32), dims=["bands", "y", "x"]
+    )
+
+    with pytest.raises(ValueError, match="unknown"):
+        batched_inference.execute(inarr)
+
+
+@patch("openeo_gfmap.inference.model_inference.requests.get")
+def test_load_ort_session_quantized(mock_get, tmp_cache):
+    """The quantized variant of the model is written once in the cache, next to
+    the downloaded model."""
+    response = mock_get.return_value.__enter__.return_value
+    response.iter_content.return_value = [_batched_model_bytes(n_bands=3)]
+
+    session = ModelInference.load_ort_session(MODEL_URL, quantized=True)
+
+    quantized_paths = list((tmp_cache / "onnx_cache").glob("*.int8.onnx"))
+    assert len(quantized_paths) == 1
+    assert not list((tmp_cache / "onnx_cache").glob("*.part"))
+
+    input_data = np.ones((1, 4, 3), dtype=np.float32)
+    np.testing.assert_allclose(
+        session.run(None, {"features": input_data})[0], 3.0, rtol=0.05
+    )
+
+    # The quantized model is reused from the cache by the other workers
+    modified_time = quantized_paths[0].stat().st_mtime_ns
+    ModelInference.load_ort_session.cache_clear()
+    ModelInference.load_ort_session(MODEL_URL, quantized=True)
+    assert quantized_paths[0].stat().st_mtime_ns == modified_time
+
+
+def test_quantized_model_path_missing_onnx(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "onnxruntime.quantization", None)
+
+    with pytest.raises(ImportError, match="quantization"):
+        ModelInference._quantized_model_path(tmp_path / "model.onnx")
@@ -5,6 +5,7 @@ from shapely.geometry import Point, Polygon
 
 from openeo_gfmap.manager.job_splitters import (
     split_job_hex,
+    split_job_hilbert,
     split_job_s2grid,
     split_job_s2sphere,
 )
@@ -97,6 +98,29 @@ def test_split_job_hex():
         ), "The number of geometries in the first split should be 3."
 
 
+def test_split_job_hilbert():
+    # Two clusters of points, far from each other and given interleaved
+    data = {
+        "id": [1, 2, 3, 4, 5, 6],
+        "geometry": [
+            Point(4.0, 50.0),
+            Point(120.0, -30.0),
+            Point(4.1, 50.1),
+            Point(120.1, -30.1),
+            Point(4.2, 50.2),
+            Point(120.2, -30.2),
+        ],
+    }
+    polygons = gpd.GeoDataFrame(data, crs="EPSG:4326")
+
+    result = split_job_hilbert(polygons, max_points=3)
+
+    assert len(result) == 2
+    assert sorted(sorted(gdf["id"]) for gdf in result) == [[1, 3, 5], [2, 4, 6]]
+    for gdf in result:
+        assert gdf.crs == 4326, "The original CRS should be preserved."
+
+
 def test_split_job_s2sphere():
     # Create a mock GeoDataFrame with points
     # The points are located in two different S2 tiles
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from openeo_gfmap.backend import BACKEND_CONNECTIONS, Backend, cdse_connection
+
+
+@patch("openeo.connect")
+def test_backend_connection_cached(mock_connect, monkeypatch):
+    """The connection to a backend is created and authenticated only once."""
+    monkeypatch.delenv("OPENEO_AUTH_METHOD", raising=False)
+    cdse_connection.cache_clear()
+
+    connection = cdse_connection()
+    assert BACKEND_CONNECTIONS[Backend.CDSE]() is connection
+
+    mock_connect.assert_called_once()
+    connection.authenticate_oidc.assert_called_once()
+
+    # Clearing the cache creates a new connection
+    cdse_connection.cache_clear()
+    cdse_connection()
+    assert mock_connect.call_count == 2
+    cdse_connection.cache_clear()
+
+
+@patch("openeo.connect")
+def test_backend_connection_client_credentials(mock_connect, monkeypatch):
+    monkeypatch.setenv("OPENEO_AUTH_METHOD", "client_credentials")
+    monkeypatch.setenv("OPENEO_AUTH_CLIENT_ID_CDSE", "client")
+    monkeypatch.setenv("OPENEO_AUTH_CLIENT_SECRET_CDSE", "secret")
+    monkeypatch.setenv("OPENEO_AUTH_PROVIDER_ID_CDSE", "provider")
+    cdse_connection.cache_clear()
+
+    connection = cdse_connection()
+
+    connection.authenticate_oidc_client_credentials.assert_called_once_with(
+        client_id="client", client_secret="secret", provider_id="provider"
+    )
+    connection.authenticate_oidc.assert_not_called()
+    cdse_connection.cache_clear()
@@ -1,9 +1,14 @@
 from unittest.mock import MagicMock
 
+import geojson
 import openeo
 import pytest
+from openeo.metadata import CollectionMetadata, SpatialDimension
 
+from openeo_gfmap.fetching import FetchType
 from openeo_gfmap.fetching.commons import (
+    _load_collection,
+    _load_collection_hybrid,
     convert_band_names,
     rename_bands,
     resample_reproject,
@@ -155,6 +160,29 @@ def test_resample_reproject_default_method():
     )
 
 
+# multi-resolution collection
+def test_resample_reproject_multi_resolution():
+    """Test that resample_reproject always resamples, as the collection metadata
+    does not describe the native resolution of every band."""
+    datacube = create_test_datacube(bands=["B02", "B05", "B09"])
+    # Collection level metadata, with the step of the 10m bands only
+    datacube.metadata = CollectionMetadata(
+        metadata={},
+        dimensions=[
+            SpatialDimension(name="x", extent=[0, 1000], crs=32631, step=10),
+            SpatialDimension(name="y", extent=[0, 1000], crs=32631, step=10),
+        ],
+    )
+    datacube.resample_spatial = MagicMock()
+
+    result = resample_reproject(datacube, resolution=10, epsg_code=32631)
+
+    datacube.resample_spatial.assert_called_once_with(
+        resolution=10, projection=32631, method="near"
+    )
+    assert result is datacube.resample_spatial.return_value
+
+
 def test_rename_bands_all_present():
     """Test rename_bands when all bands in the mapping are present in the datacube."""
 
@@ -223,3 +251,210 @@ def test_rename_bands_no_bands_present():
 
     # Check that only the available bands have been renamed
     assert result_band_names == []
+
+
+def test_rename_bands_identity():
+    """Test rename_bands when the bands already have the target names."""
+
+    datacube = create_test_datacube(bands=["B01", "B02"])
+
+    mapping = {"B01": "B01", "B02": "B02", "B03": "green"}
+
+    result = rename_bands(datacube, mapping)
+
+    # No rename_labels process is added to the graph
+    assert result is datacube
+
+
+def test_load_collection_polygon_filters_first():
+    """Test that the polygon spatial filter is applied before the merge."""
+
+    connection = MagicMock()
+    pre_merge_cube = MagicMock(spec=openeo.DataCube)
+    polygons = geojson.FeatureCollection([])
+
+    result = _load_collection(
+        connection,
+        bands=["B02"],
+        collection_name="SENTINEL2_L2A",
+        spatial_extent=polygons,
+        temporal_extent=None,
+        fetch_type=FetchType.POLYGON,
+        pre_merge=pre_merge_cube,
+    )
+
+    loaded_cube = connection.load_collection.return_value
+    loaded_cube.filter_spatial.assert_called_once_with(polygons)
+    pre_merge_cube.filter_spatial.assert_called_once_with(polygons)
+    loaded_cube.filter_spatial.return_value.merge_cubes.assert_called_once_with(
+        pre_merge_cube.filter_spatial.return_value
+    )
+    assert result is loaded_cube.filter_spatial.return_value.merge_cubes.return_value
+
+
+def test_load_collection_polygon_extent():
+    """Test that only the bounding box of the polygons is loaded."""
+
+    connection = MagicMock()
+    polygons = geojson.FeatureCollection(
+        [
+            geojson.Feature(geometry=geojson.Polygon([[(4, 50), (5, 50), (5, 51)]])),
+            geojson.Feature(geometry=geojson.Polygon([[(3, 49), (4, 49), (4, 50)]])),
+        ]
+    )
+
+    _load_collection(
+        connection,
+        bands=["B02"],
+        collection_name="SENTINEL2_L2A",
+        spatial_extent=polygons,
+        temporal_extent=None,
+        fetch_type=FetchType.POLYGON,
+    )
+
+    assert connection.load_collection.call_args.kwargs["spatial_extent"] == {
+        "west": 3,
+        "south": 49,
+        "east": 5,
+        "north": 51,
+        "crs": 4326,
+    }
+
+
+@pytest.mark.parametrize("with_geometry", [True, False])
+def test_load_collection_polygon_extent_null_geometry(with_geometry):
+    """Test that the features without geometry are ignored in the extent."""
+
+    connection = MagicMock()
+    features = [geojson.Feature(geometry=None)]
+    if with_geometry:
+        features.append(
+            geojson.Feature(geometry=geojson.Polygon([[(4, 50), (5, 50), (5, 51)]]))
+        )
+
+    _load_collection(
+        connection,
+        bands=["B02"],
+        collection_name="SENTINEL2_L2A",
+        spatial_extent=geojson.FeatureCollection(features),
+        temporal_extent=None,
+        fetch_type=FetchType.POLYGON,
+    )
+
+    spatial_extent = connection.load_collection.call_args.kwargs["spatial_extent"]
+    if with_geometry:
+        assert spatial_extent == {
+            "west": 4,
+            "south": 50,
+            "east": 5,
+            "north": 51,
+            "crs": 4326,
+        }
+    else:
+        assert spatial_extent is None
+
+
+@pytest.mark.parametrize(
+    "crs, expected_crs",
+    [
+        ("urn:ogc:def:crs:EPSG::3035", 3035),
+        ("urn:ogc:def:crs:OGC:1.3:CRS84", None),
+        ("unknown", None),
+        (None, None),
+    ],
+)
+def test_load_collection_polygon_extent_projected(crs, expected_crs):
+    """Test that the bounding box of projected polygons is given in their CRS,
+    and that the full extent is loaded if their CRS is unknown."""
+
+    connection = MagicMock()
+    polygons = geojson.FeatureCollection(
+        [
+            geojson.Feature(
+                geometry=geojson.Polygon(
+                    [[(3900000, 3100000), (3910000, 3100000), (3910000, 3110000)]]
+                )
+            )
+        ]
+    )
+    if crs is not None:
+        polygons["crs"] = {"type": "name", "properties": {"name": crs}}
+
+    _load_collection(
+        connection,
+        bands=["B02"],
+        collection_name="SENTINEL2_L2A",
+        spatial_extent=polygons,
+        temporal_extent=None,
+        fetch_type=FetchType.POLYGON,
+    )
+
+    spatial_extent = connection.load_collection.call_args.kwargs["spatial_extent"]
+    if expected_crs is None:
+        assert spatial_extent is None
+    else:
+        assert spatial_extent == {
+            "west": 3900000,
+            "south": 3100000,
+            "east": 3910000,
+            "north": 3110000,
+            "crs": expected_crs,
+        }
+
+
+def test_load_collection_polygon_update_arguments():
+    """Test that the process graph updates are set on the load_collection
+    process, and not on the spatial filter of the polygons."""
+
+    connection = MagicMock()
+    connection.load_collection.side_effect = (
+        lambda collection_id, **kwargs: openeo.DataCube.load_collection(
+            collection_id,
+            connection=MagicMock(spec=openeo.Connection),
+            fetch_metadata=False,
+            **kwargs,
+        )
+    )
+    polygons = geojson.FeatureCollection(
+        [geojson.Feature(geometry=geojson.Polygon([[(4, 50), (5, 50), (5, 51)]]))]
+    )
+
+    result = _load_collection(
+        connection,
+        bands=["B02"],
+        collection_name="SENTINEL2_L2A",
+        spatial_extent=polygons,
+        temporal_extent=None,
+        fetch_type=FetchType.POLYGON,
+        update_arguments={"featureflags": {"tilesize": 128}},
+    )
+
+    nodes = {node["process_id"]: node for node in result.flat_graph().values()}
+    assert list(nodes) == ["load_collection", "filter_spatial"]
+    assert nodes["load_collection"]["arguments"]["featureflags"] == {"tilesize": 128}
+    assert "featureflags" not in nodes["filter_spatial"]["arguments"]
+
+
+def test_load_collection_hybrid_stac_band_names():
+    """Test that the STAC bands are only renamed when their names differ."""
+
+    connection = MagicMock()
+    connection.load_stac.return_value = create_test_datacube(bands=["B01", "B02"])
+
+    result = _load_collection_hybrid(
+        connection, is_stac=True, collection_id_or_url="url", bands=["B01", "B02"]
+    )
+
+    # No rename_labels process is added to the graph
+    assert result is connection.load_stac.return_value
+
+    connection.load_stac.return_value = MagicMock()
+    connection.load_stac.return_value.metadata.band_names = ["band_1", "band_2"]
+
+    _load_collection_hybrid(
+        connection, is_stac=True, collection_id_or_url="url", bands=["B01", "B02"]
+    )
+
+    connection.load_stac.return_value.rename_labels.assert_called_once_with(
+        dimension="bands", target=["B01", "B02"]
+    )
@@ -44,9 +44,11 @@ def create_test_datacube(bands=None):
 def load_dataset_url(url: str) -> NamedTemporaryFile:
     """Download a NetCDF file from the internet and return a Xarray Dataset."""
     with NamedTemporaryFile(suffix=".nc", delete=True) as tmpfile:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        tmpfile.write(response.content)
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                tmpfile.write(chunk)
+        tmpfile.flush()
 
         inds = xr.open_dataset(tmpfile.name)
 
@@ -56,9 +58,11 @@ def load_dataset_url(url: str) -> NamedTemporaryFile:
 def load_dataarray_url(url: str) -> NamedTemporaryFile:
     """Download a NetCDF file from the internet and return a Xarray Dataset."""
     with NamedTemporaryFile(suffix=".nc", delete=True) as tmpfile:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        tmpfile.write(response.content)
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                tmpfile.write(chunk)
+        tmpfile.flush()
 
         inds = xr.open_dataarray(tmpfile.name)
 